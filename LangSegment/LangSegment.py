@@ -13,13 +13,28 @@ Projects:
 https://github.com/juntaosun/LangSegment
 """
 
+import logging
+import os
 import re
+import threading
+from bisect import bisect_right
 from collections import defaultdict
+from functools import lru_cache
+from time import perf_counter
 
 # import langid
-import py3langid as langid
+# import py3langid as langid  # 由 model.py 在首次识别时导入 , imported by model.py on the first classification
 # pip install py3langid==0.2.2
 
+from .cache import ResultCache, DiskCache
+from .model import model, filter_languages, model_version
+from . import hanzi
+from .lexicon import Lexicon
+from .instrument import SegmentStats
+from .segment import Segment, todicts
+
+_logger = logging.getLogger(__name__)
+
 
 # -----------------------------------
 # 更新日志：新版本分词更加精准。
@@ -53,13 +68,102 @@ import py3langid as langid
 # Error demonstration: "Your name is <ja>佐々木。" Single <ja> tags that appear in this sentence will be ignored and will not be processed.
 # ===========================================================================================================
 
-class LangSegment():
+# 文字区间表：汉字 / 日文假名 / 韩文音节
+# Unicode script range tables: Han / Kana / Hangul
+HAN_RANGES    = (('\u4e00', '\u9fff'),)
+KANA_RANGES   = (('\u3040', '\u309F'), ('\u30A0', '\u30FF'))
+HANGUL_RANGES = (('\uac00', '\ud7a3'),)
+
+def _char_class(ranges):
+    return "".join(f"{start}-{end}" for start , end in ranges)
+
+# 预编译的正则，导入时只编译一次，避免热路径中重复编译
+# Precompiled patterns, compiled once at import time instead of on the hot path
+_HAN_CHAR       = re.compile(f'[{_char_class(HAN_RANGES)}]')
+_KANA_CHAR      = re.compile(f'[{_char_class(KANA_RANGES)}]')
+_ENGLISH_WORD   = re.compile(r'^[a-zA-Z]+$')
+_UPPER_CASE     = re.compile(r'(?<!\b)([A-Z])')
+_ENDING_CHAR    = re.compile(r'([「」“”‘’"\':：。.！!?．？])')
+_SPACES         = re.compile(r'\s+')
+_NEWLINES       = re.compile(r'\n+')
+_NON_WORD       = re.compile(r'([^\w]+)')
+_PUNCTUATION    = re.compile(r'([^\w\s]+)')
+_NUMBER_TAG     = re.compile(r'(⑥\d{6,}⑥)')
+_ANY_TAG        = re.compile(r'⑥\$?\d{7,}⑥')
+
+# 输入开头只有标点、尚无语种可沿用时的等待标记，并入下一个保存的片段
+# Wait marker for leading punctuation with no language to follow yet, merged into the next saved segment
+_LANG_PENDING   = "|"
+
+# 单一文字片段的快速判定：数字与下划线不影响判定，日文允许汉字与々，但必须含有假名
+# Single-script fast path: digits and "_" are neutral, Japanese may mix Han and 々 but must contain kana
+_SCRIPT_NEUTRAL = re.compile(r'[0-9_]+')
+_HANGUL_ONLY    = re.compile(f'[{_char_class(HANGUL_RANGES)}]+')
+_JAPANESE_ONLY  = re.compile(f'[{_char_class(HAN_RANGES + KANA_RANGES)}\u3005]+')
+_ASCII_ONLY     = re.compile(r'[a-zA-Z]+')
+_HAN_ONLY       = re.compile(f'[{_char_class(HAN_RANGES)}\u3005]+')
+
+
+def _as_filters(filters):
+    # 单个字符串视为一个过滤器，"zh_en" 等同于 ["zh_en"] , a single string is one filter, "zh_en" means ["zh_en"]
+    return [filters] if isinstance(filters , str) else filters
+
+
+@lru_cache(maxsize=256)
+def _compile_filters(filters):
+    """
+    功能：将过滤器预编译为保留语种的集合，None 表示全部保留；等价于原先的子串判断 language in filters[0]。
+    Function: Precompile filters into the set of kept languages, None keeping everything; equivalent to the
+    former substring test `language in filters[0]`.\n
+    Args:
+        filters (tuple): ("zh", "en") , ("zh_ja",) , ("all",)
+    Returns:
+        frozenset | None
+    """
+    if filters is None or len(filters) == 0:return None
+    first = filters[0]
+    if first == "*" or first in "alls-mixs-autos":return None
+    accept = set(filters)
+    accept.update(first[i:j] for i in range(len(first) + 1) for j in range(i , len(first) + 1))
+    return frozenset(accept)
+
+
+class _Context():
+    """
+    单次分词调用的临时状态，每次调用独立创建，因此多个线程可以共享同一个分词器。
+    Per-call scratch state. A new one is created for every call, so one segmenter can be shared across threads.
+    """
+    __slots__ = ("filters", "accept", "langs", "text_cache", "text_waits", "lang_count", "lang_eos", "lang_last",
+                 "prefetch", "fragments", "offsets", "model_calls", "script_hits", "context_hits", "stats")
     
-    _text_cache = None
-    _text_lasts = None
-    _text_langs = None
-    _lang_count = None
-    _lang_eos =   None
+    def __init__(self, filters):
+        self.filters = filters
+        # 保留的语种，None 为全部保留 , kept languages, None keeps everything
+        self.accept = _compile_filters(tuple(filters)) if filters is not None else None
+        # 模型只对过滤器中的语种打分，None 为全部语种
+        # The model only scores the filtered languages, None for all of them
+        self.langs = filter_languages(tuple(filters)) if filters is not None else None
+        self.text_cache = {}
+        self.text_waits = []
+        self.lang_count = None
+        self.lang_eos = False
+        # 最近保存的语种（包括被过滤的）, last saved language, including filtered ones
+        self.lang_last = None
+        # 批量识别的结果：片段 -> 语种 , batch classification results: fragment -> language
+        self.prefetch = None
+        self.fragments = None
+        # 占位符 -> 原文位置，仅 getSpans 时为字典 , placeholder -> original offsets, a dict only for getSpans
+        self.offsets = None
+        # 模型调用统计 , model invocation counters
+        self.model_calls = 0
+        self.script_hits = 0
+        self.context_hits = 0
+        # 埋点统计，未设置回调时为 None , instrumentation, None when no hook is set
+        self.stats = None
+        pass
+
+
+class Segmenter():
     
     # 可自定义语言匹配标签：
     # Customizable language matching tags: These are supported
@@ -93,307 +197,939 @@ class LangSegment():
     
     # DEFINITION
     PARSE_TAG = re.compile(r'(⑥\$\d+[\d]{6,}⑥)')
+    # 批量识别的门槛：文本字数与需要模型的片段数，低于时逐条识别更快
+    # Batch classification thresholds: text length and fragments needing the model; below them one-by-one is faster
+    PREFETCH_CHARS = 64
+    PREFETCH_MIN = 4
+    # 单次调用选项及其默认值 , per-call options and their defaults
+    # cache : 是否使用结果缓存 , whether the result cache is used
+    OPTIONS = {"cache": True}
     
-    @staticmethod
-    def _clears():
-        LangSegment._text_cache = None
-        LangSegment._text_lasts = None
-        LangSegment._text_langs = None
-        LangSegment._text_waits = None
-        LangSegment._lang_count = None
-        LangSegment._lang_eos   = None
+    def __init__(self, filters=None, cache_size=0, cache_bytes=None, hook=None, lexicon=None):
+        """
+        功能：创建一个独立的分词器实例，拥有自己的过滤器，可在多线程间共享。
+        Function: Create an independent segmenter with its own filters, safe to share across threads.\n
+        Args:
+            filters (list): ["zh", "en", "ja", "ko"]
+            cache_size (int): LRU结果缓存条目数，0为关闭 , LRU result cache entries, 0 disables it
+            cache_bytes (int): LRU结果缓存估算字节上限 , estimated byte limit of the LRU result cache
+            hook (callable): 埋点回调，每次分词后以 SegmentStats 调用 , stats callback, called with a SegmentStats after every call
+            lexicon (Lexicon): 用户词典，同 setlexicon , user lexicon, same as setlexicon
+        """
+        if filters is not None:self.Langfilters = _as_filters(filters)
+        self._hook = hook
+        self._lexicon = None
+        # 每个线程的最近一次结果，用于 getCounts 及重复输入
+        # Last result of each thread, used by getCounts and repeated input
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._model_stats = {"model_calls": 0, "script_hits": 0, "context_hits": 0}
+        self._cache = None
+        self.setcache(cache_size, cache_bytes)
+        if lexicon is not None:self.setlexicon(lexicon)
         pass
+
+    def setcache(self, max_entries=1024, max_bytes=None):
+        """
+        功能：开启或关闭 LRU 结果缓存，按 (文本, 过滤器) 缓存分词结果。
+        Function: Enable or disable the LRU result cache keyed by (text, filters).\n
+        Args:
+            max_entries (int): 最大条目数，0为关闭 , max entries, 0 disables the cache
+            max_bytes (int): 估算字节上限，None为不限 , estimated byte limit, None for unlimited
+        """
+        self._cache = ResultCache(max_entries, max_bytes) if max_entries and max_entries > 0 else None
+        pass
+
+    def sethook(self, hook):
+        """
+        功能：设置埋点回调，每次分词后以 SegmentStats 调用，None 为关闭（关闭时几乎无额外开销）。
+        Function: Set the stats callback, called with a SegmentStats after every call; None disables it at near-zero cost.
+        Exceptions raised by the hook are logged and do not affect the result.\n
+        Args:
+            hook (callable): hook(stats) , 例如 StatsCollector() , e.g. StatsCollector()
+        """
+        self._hook = hook
+        pass
+
+    def getCacheStats(self):
+        """
+        功能：LRU 结果缓存统计，未开启时返回 None。
+        Function: LRU result cache statistics, None when the cache is disabled.
+        """
+        cache = self._cache
+        return cache.stats() if cache is not None else None
+
+    def setlexicon(self, lexicon):
+        """
+        功能：设置用户词典，词典中的词条直接使用指定的语种（及读音文本），跳过语种识别；None 为关闭。
+        修改词典后需再次调用，以清除结果缓存。
+        Function: Set the user lexicon; its terms take the given language (and pronunciation text) directly
+        and skip classification. None disables it. Call it again after changing the lexicon so the result
+        cache is cleared.\n
+        Args:
+            lexicon (Lexicon|dict|str): Lexicon 对象、{词条: 语种} 字典或词典文件路径 , a Lexicon, a {term: lang} dict or a lexicon file path
+        """
+        if isinstance(lexicon , str):lexicon = Lexicon().load(lexicon)
+        elif isinstance(lexicon , dict):lexicon = Lexicon(lexicon)
+        # 提前编译，首次分词不承担编译耗时 , compile up front so the first call does not pay for it
+        if lexicon is not None:lexicon.compile()
+        self._lexicon = lexicon
+        self._clears()
+        pass
+
+    def getlexicon(self):
+        return self._lexicon
+
+    def _clears(self, cache=True):
+        local = self._local
+        local.text_lasts = None
+        local.text_langs = None
+        local.lang_count = None
+        if cache and self._cache is not None:self._cache.clear()
+        pass
+
+    def _call_args(self, filters, options):
+        # 单次调用的过滤器与选项，不修改实例状态 , per-call filters and options, the instance state is left untouched
+        filters = self.Langfilters if filters is None else _as_filters(filters)
+        if not options:return filters , True
+        unknown = set(options) - set(self.OPTIONS)
+        if unknown:raise ValueError(f"unknown options: {', '.join(sorted(unknown))}")
+        return filters , bool(options.get("cache" , self.OPTIONS["cache"]))
     
     @staticmethod
     def _is_english_word(word):
-        return bool(re.match(r'^[a-zA-Z]+$', word))
+        return bool(_ENGLISH_WORD.match(word))
 
     @staticmethod
     def _is_chinese(word):
-        for char in word:
-            if '\u4e00' <= char <= '\u9fff':
-                return True
-        return False
+        return _HAN_CHAR.search(word) is not None
     
     @staticmethod
     def _is_japanese_kana(word):
-        pattern = re.compile(r'[\u3040-\u309F\u30A0-\u30FF]+')
-        matches = pattern.findall(word)
-        return len(matches) > 0
+        return _KANA_CHAR.search(word) is not None
     
     @staticmethod
     def _insert_english_uppercase(word):
-        modified_text = re.sub(r'(?<!\b)([A-Z])', r' \1', word)
+        modified_text = _UPPER_CASE.sub(r' \1', word)
         modified_text = modified_text.strip('-')
         return modified_text + " "
     
-    @staticmethod
-    def _saveData(words,language:str,text:str):
+    def _saveData(self,ctx,words,language:str,text:str,span=None):
         # Language word statistics
-        lang_count = LangSegment._lang_count
+        lang_count = ctx.lang_count
         if lang_count is None:lang_count = defaultdict(int)
         if not "|" in language:lang_count[language] += int(len(text)//2) if language == "en" else len(text)
-        LangSegment._lang_count = lang_count
+        ctx.lang_count = lang_count
+        if not "|" in language:ctx.lang_last = language
         # Merge the same language and save the results
         preData = words[-1] if len(words) > 0 else None
-        if preData and  (preData["lang"] == language):
-            text = preData["text"] + text
-            preData["text"] = text
+        if preData and  (preData.lang == language):
+            preData.append(text , span[1] if span is not None else None)
             return preData
-        data = {"lang":language,"text": text}
-        filters = LangSegment.Langfilters
-        if filters is None or len(filters) == 0 or "?" in language or   \
-            language in filters or language in filters[0] or \
-            filters[0] == "*" or filters[0] in "alls-mixs-autos":
+        data = Segment(language , text) if span is None else Segment(language , text , *span)
+        accept = ctx.accept
+        if accept is None or language in accept or "?" in language:
             words.append(data)
         return data
 
-    @staticmethod
-    def _addwords(words,language,text):
+    def _addwords(self,ctx,words,language,text,span=None):
         if text is None or len(text.strip()) == 0:return True
+        stats = ctx.stats
+        if stats is not None:start = perf_counter()
         if language is None:language = ""
         language = language.lower()
-        if language == 'en':text = LangSegment._insert_english_uppercase(text)
+        if language == 'en':text = self._insert_english_uppercase(text)
         # text = re.sub(r'[(（）)]', ',' , text) # Keep it.
-        text_waits = LangSegment._text_waits
+        text_waits = ctx.text_waits
+        if len(text_waits) > 0 and text_waits[-1].lang == _LANG_PENDING:
+            # 开头的标点并入本片段 , the leading punctuation joins this segment
+            pending = text_waits.pop()
+            text = pending.text + text
+            if span is not None:span = (pending.start , span[1])
         ispre_waits = len(text_waits)>0
         preResult = text_waits.pop() if ispre_waits else None
         if preResult is None:preResult = words[-1] if len(words) > 0 else None
-        if preResult and ("|" in preResult["lang"]):   
-            pre_lang = preResult["lang"]
-            if language in pre_lang:preResult["lang"] = language = language.split("|")[0]
-            else:preResult["lang"]=pre_lang.split("|")[0]
-            if ispre_waits:preResult = LangSegment._saveData(words,preResult["lang"],preResult["text"])
-        pre_lang = preResult["lang"] if preResult else None
+        if preResult and ("|" in preResult.lang):
+            pre_lang = preResult.lang
+            if language in pre_lang:preResult.lang = language = language.split("|")[0]
+            else:preResult.lang = pre_lang.split("|")[0]
+            if ispre_waits:
+                pre_span = (preResult.start , preResult.end) if span is not None else None
+                preResult = self._saveData(ctx,words,preResult.lang,preResult.text,pre_span)
+        pre_lang = preResult.lang if preResult else None
         if ("|" in language) and (pre_lang and not pre_lang in language and not "…" in language):language = language.split("|")[0]
-        filters = LangSegment.Langfilters
-        if "|" in language:LangSegment._text_waits.append({"lang":language,"text": text})
-        else:LangSegment._saveData(words,language,text)
+        if "|" in language:text_waits.append(Segment(language , text) if span is None else Segment(language , text , *span))
+        else:self._saveData(ctx,words,language,text,span)
+        if stats is not None:stats.addwords += perf_counter() - start
         return False
     
     @staticmethod
-    def _get_prev_data(words):
-        data = words[-1] if words and len(words) > 0 else None
-        if data:return (data["lang"] , data["text"])
-        return (None,"")
+    def _get_prev_lang(words):
+        # 只取语种，不拼接前一个结果的文本 , language only, the previous text is not joined
+        return words[-1].lang if words and len(words) > 0 else None
     
     @staticmethod
     def _match_ending(input , index):
         if input is None or len(input) == 0:return False,None
-        input = re.sub(r'\s+', '', input)
+        input = _SPACES.sub('', input)
         if len(input) == 0 or abs(index) > len(input):return False,None
-        ending_pattern = re.compile(r'([「」“”‘’"\':：。.！!?．？])')
-        return ending_pattern.match(input[index]),input[index]
+        return _ENDING_CHAR.match(input[index]),input[index]
     
     @staticmethod
     def _cleans_text(cleans_text):
-        cleans_text = re.sub(r'([^\w]+)', '', cleans_text)
+        cleans_text = _NON_WORD.sub('', cleans_text)
         return cleans_text
     
     @staticmethod
-    def _lang_classify(cleans_text):
-        language, *_ = langid.classify(cleans_text)
+    def _script_language(cleans_text , langs=None):
+        # 仅由文字即可确定语种时直接返回，否则返回 None 交给模型；langs 为模型的候选语种
+        # Return the language when the script alone decides it, otherwise None for the model; langs are the model's candidates
+        text = _SCRIPT_NEUTRAL.sub('', cleans_text)
+        if len(text) == 0:return None
+        if _HANGUL_ONLY.fullmatch(text):return "ko"
+        if _ASCII_ONLY.fullmatch(text):return "en"
+        if _JAPANESE_ONLY.fullmatch(text) and _KANA_CHAR.search(text):return "ja"
+        # 只含汉字时查中日对照表，不够置信才交给模型 , Han only: the zh/ja table decides unless it is unsure
+        if _HAN_ONLY.fullmatch(text):return hanzi.decide(text , langs)
+        return None
+
+    def _lang_classify(self,ctx,cleans_text):
+        language = self._script_language(cleans_text , ctx.langs)
+        if language is not None:
+            ctx.script_hits += 1
+            return language
+        ctx.model_calls += 1
+        prefetch = ctx.prefetch
+        if prefetch is not None:
+            language = prefetch.get(cleans_text)
+            if language is not None:return language
+        stats = ctx.stats
+        if stats is None:
+            language, *_ = model.classify(cleans_text, ctx.langs)
+            return language
+        start = perf_counter()
+        language, *_ = model.classify(cleans_text, ctx.langs)
+        stats.classify += perf_counter() - start
         return language
     
     @staticmethod
-    def _parse_language(words , segment):
-        LANG_JA = "ja"
-        LANG_ZH = "zh"
-        language = LANG_ZH
-        regex_pattern = re.compile(r'([^\w\s]+)')
+    def _split_fragments(segment):
+        # 按标点切分片段，只有标点的片段并入下一个片段 , split on punctuation, punctuation-only pieces join the next one
+        # 返回 [(片段 , 是否结尾 , 清理后的文本)] , returns [(fragment , EOS , cleaned text)]
+        fragments = []
+        regex_pattern = _PUNCTUATION
         lines = regex_pattern.split(segment)
         lines_max = len(lines)
-        LANG_EOS =LangSegment._lang_eos
         for index, text in enumerate(lines):
             if len(text) == 0:continue
             EOS = index >= (lines_max - 1)
             nextId = index + 1
             nextText = lines[nextId] if not EOS else ""
-            nextPunc = len(re.sub(regex_pattern,'',re.sub(r'\n+','',nextText)).strip()) == 0
-            textPunc = len(re.sub(regex_pattern,'',re.sub(r'\n+','',text)).strip()) == 0
+            nextPunc = len(regex_pattern.sub('',_NEWLINES.sub('',nextText)).strip()) == 0
+            textPunc = len(regex_pattern.sub('',_NEWLINES.sub('',text)).strip()) == 0
             if not EOS and (textPunc == True or ( len(nextText.strip()) >= 0 and nextPunc == True)):
                 lines[nextId] = f'{text}{nextText}'
                 continue
-            number_tags = re.compile(r'(⑥\d{6,}⑥)')
-            cleans_text = re.sub(number_tags, '' ,text)
-            cleans_text = LangSegment._cleans_text(cleans_text)
-            language = LangSegment._lang_classify(cleans_text)
-            prev_language , prev_text = LangSegment._get_prev_data(words)
-            if len(cleans_text) <= 3 and LangSegment._is_chinese(cleans_text):
-                if EOS and LANG_EOS: language = LANG_ZH if len(cleans_text) <= 1 else language
-                elif LangSegment._is_japanese_kana(cleans_text):language = LANG_JA
+            cleans_text = Segmenter._cleans_text(_NUMBER_TAG.sub('' ,text))
+            fragments.append((text , EOS , cleans_text))
+        return fragments
+
+    def _fragments(self, ctx, segment):
+        # 预取时已切分的片段直接复用 , reuse the fragments already split by the prefetch walk
+        cached = ctx.fragments
+        fragments = cached.get(segment) if cached is not None else None
+        if fragments is None:fragments = self._split_fragments(segment)
+        return fragments
+
+    def _parse_language(self,ctx,words,segment,base=None):
+        LANG_JA = "ja"
+        LANG_ZH = "zh"
+        language = LANG_ZH
+        LANG_EOS = ctx.lang_eos
+        # base 为片段在原文中的起点，仅 getSpans 时传入 , original offset of the segment, only passed for getSpans
+        origin = self._offset_map(ctx , segment , base) if base is not None else None
+        position = 0
+        for text , EOS , cleans_text in self._fragments(ctx , segment):
+            if ctx.stats is not None:ctx.stats.fragments += 1
+            prev_language = self._get_prev_lang(words)
+            if len(cleans_text) == 0:
+                # 只有标点的片段从不交给模型，受限模型对空文本只会返回先验语种：有等待的片段时并入其中，
+                # 否则沿用前一个语种，输入开头则等待下一个片段
+                # A punctuation-only fragment never reaches the model, the restricted model only returns its prior
+                # on empty text: it joins the waiting fragment if there is one, otherwise keeps the previous
+                # language, or waits for the next fragment at the start of the input
+                ctx.context_hits += 1
+                if len(ctx.text_waits) > 0:language = None
+                elif ctx.lang_last:language = ctx.lang_last
+                else:language = _LANG_PENDING
+            elif len(cleans_text) <= 3 and self._is_chinese(cleans_text):
+                # 短汉字片段由上下文规则决定，只在结果会被采用时才调用模型
+                # Short Han fragments follow the context rules, the model only runs when its answer is used
+                language = None
+                if EOS and LANG_EOS:
+                    if len(cleans_text) <= 1:language = LANG_ZH
+                elif self._is_japanese_kana(cleans_text):language = LANG_JA
                 else:
                     LANG_UNKNOWN = f'{LANG_ZH}|{LANG_JA}'
-                    match_end,match_char = LangSegment._match_ending(text, -1)
+                    match_end,match_char = self._match_ending(text, -1)
                     referen = prev_language in LANG_UNKNOWN or LANG_UNKNOWN in prev_language if prev_language else False
-                    if match_char in "。.": language = prev_language if referen and len(words) > 0 else language
+                    if match_char in "。.":
+                        if referen and len(words) > 0:language = prev_language
                     else:language = f"{LANG_UNKNOWN}|…"
-            text,*_ = re.subn(number_tags , LangSegment._restore_number , text )
-            LangSegment._addwords(words,language,text)
+                if language is None:language = self._lang_classify(ctx,cleans_text)
+                else:ctx.context_hits += 1
+            else:
+                language = self._lang_classify(ctx,cleans_text)
+            span = None
+            if origin is not None:
+                span = (origin(position) , origin(position + len(text)))
+                position += len(text)
+            text,*_ = _NUMBER_TAG.subn(lambda matche:self._restore_number(ctx,matche) , text )
+            if language is None:ctx.text_waits[-1].append(text , span[1] if span is not None else None)
+            else:self._addwords(ctx,words,language,text,span)
             pass
         pass
     
     @staticmethod
-    def _restore_number(matche):
+    def _restore_number(ctx,matche):
         value = matche.group(0)
-        text_cache = LangSegment._text_cache
+        text_cache = ctx.text_cache
         if value in text_cache:
             process , data = text_cache[value]
-            tag , match = data
+            tag , match , _ = data
             value = match
         return value
     
     @staticmethod
-    def _pattern_symbols(item , text):
+    def _pattern_symbols(ctx , item , text , whole=True):
         if text is None:return text
         tag , pattern , process = item
-        matches = pattern.findall(text)
-        if len(matches) == 1 and "".join(matches[0]) == text:
+        # 单次扫描：每个匹配在同一遍替换中换成占位符，而不是逐个重新扫描全文
+        # Single pass: every match is swapped for its placeholder in one sweep instead of rescanning per match
+        groups = pattern.groups
+        spans = []
+        offsets = ctx.offsets
+        def replace(matche):
+            match = matche.groups('') if groups > 1 else matche.group(groups)
+            key = f"⑥{tag}{len(spans):06d}⑥"
+            spans.append((key , match , matche.regs if offsets is not None else None))
+            return key
+        result = pattern.sub(replace , text)
+        if whole and len(spans) == 1 and "".join(spans[0][1]) == text:
             return text
-        for i , match in enumerate(matches):
-            key = f"⑥{tag}{i:06d}⑥"
-            text = re.sub(pattern , key , text , count=1)
-            LangSegment._text_cache[key] = (process , (tag , match))
-        return text
+        text_cache = ctx.text_cache
+        if offsets is None:
+            for key , match , _ in spans:
+                text_cache[key] = (process , (tag , match , None))
+            return result
+        # 记录每个匹配及其分组在原文中的位置 , record where each match and its groups sit in the original text
+        origin = Segmenter._offset_map(ctx , text , 0)
+        for key , match , regs in spans:
+            regs = tuple((origin(start) , origin(end)) if start >= 0 else None for start , end in regs)
+            offsets[key] = regs[0]
+            text_cache[key] = (process , (tag , match , regs))
+        return result
     
     @staticmethod
-    def _process_symbol(words,data):
-        tag , match = data
+    def _offset_map(ctx , text , base):
+        # 占位符文本中的位置 -> 原文位置：普通字符与原文一一对应，占位符按其记录的原文区间展开
+        # Position in placeholder text -> original offset: plain characters map one to one,
+        # placeholders expand to the original range recorded for them
+        offsets = ctx.offsets
+        ends , origins = [] , []
+        for matche in _ANY_TAG.finditer(text):
+            span = offsets.get(matche.group(0))
+            if span is None:continue
+            ends.append(matche.end())
+            origins.append(span[1])
+        if len(ends) == 0:return lambda index:base + index
+        def origin(index):
+            i = bisect_right(ends , index) - 1
+            return base + index if i < 0 else origins[i] + index - ends[i]
+        return origin
+
+    @staticmethod
+    def _lexicon_symbols(ctx , lexicon , text):
+        # 词典词条换成占位符：一遍扫描，已有占位符（语言标签）内部不匹配
+        # Swap lexicon terms for placeholders in one pass, never matching inside existing placeholders (language tags)
+        matches , position = [] , 0
+        for matche in _ANY_TAG.finditer(text):
+            matches += lexicon.finditer(text , position , matche.start())
+            position = matche.end()
+        matches += lexicon.finditer(text , position)
+        if len(matches) == 0:return text
+        text_cache = ctx.text_cache
+        offsets = ctx.offsets
+        origin = Segmenter._offset_map(ctx , text , 0) if offsets is not None else None
+        parts , position = [] , 0
+        for index , (start , end , language , value) in enumerate(matches):
+            key = f"⑥{TAG_LEX}{index:06d}⑥"
+            regs = None
+            if origin is not None:
+                regs = offsets[key] = (origin(start) , origin(end))
+            text_cache[key] = (Segmenter._process_lexicon , (TAG_LEX , (text[start:end] , language , value) , regs))
+            parts.append(text[position:start])
+            parts.append(key)
+            position = end
+        parts.append(text[position:])
+        return "".join(parts)
+
+    def _process_lexicon(self,ctx,words,data):
+        tag , match , regs = data
+        term , language , text = match
+        self._addwords(ctx,words,language,text,regs)
+        pass
+
+    def _process_symbol(self,ctx,words,data):
+        tag , match , regs = data
         language = match[1]
         text = match[2]
-        LangSegment._addwords(words,language,text)
+        self._addwords(ctx,words,language,text,regs[3] if regs else None)
         pass
     
-    @staticmethod
-    def _process_english(words,data):
-        tag , match = data
+    def _process_english(self,ctx,words,data):
+        tag , match , regs = data
         text = match[0]
         language = "en"
-        LangSegment._addwords(words,language,text)
+        self._addwords(ctx,words,language,text,regs[1] if regs else None)
         pass
     
-    @staticmethod
-    def _process_korean(words,data):
-        tag , match = data
+    def _process_korean(self,ctx,words,data):
+        tag , match , regs = data
         text = match[0]
         language = "ko"
-        LangSegment._addwords(words,language,text)
+        self._addwords(ctx,words,language,text,regs[1] if regs else None)
         pass
     
-    @staticmethod
-    def _process_quotes(words,data):
-        tag , match = data
+    def _process_quotes(self,ctx,words,data):
+        tag , match , regs = data
         text = "".join(match)
-        childs = LangSegment.PARSE_TAG.findall(text)
+        span = regs[0] if regs else None
+        base = span[0] if span else None
+        childs = self.PARSE_TAG.findall(text)
         if len(childs) > 0:
-            LangSegment._process_tags(words , text , False)
+            self._process_tags(ctx , words , text , False , base=base)
         else:
-            cleans_text = LangSegment._cleans_text(match[1])
+            cleans_text = self._cleans_text(match[1])
             if len(cleans_text) <= 3:
-                LangSegment._parse_language(words,text)
+                self._parse_language(ctx,words,text,base)
             else:
-                language = LangSegment._lang_classify(cleans_text)
-                LangSegment._addwords(words,language,text)
+                if ctx.stats is not None:ctx.stats.fragments += 1
+                language = self._lang_classify(ctx,cleans_text)
+                self._addwords(ctx,words,language,text,span)
         pass
     
-    @staticmethod
-    def _process_number(words,data): # "$0" process only
+    def _process_number(self,ctx,words,data): # "$0" process only
         """
         Numbers alone cannot accurately identify language.
         Because numbers are universal in all languages.
         So it won't be executed here, just for testing.
         """
-        tag , match = data
-        language = words[0]["lang"] if len(words) > 0 else "zh"
+        tag , match , regs = data
+        language = words[0].lang if len(words) > 0 else "zh"
         text = match
-        LangSegment._addwords(words,language,text)
+        self._addwords(ctx,words,language,text,regs[0] if regs else None)
         pass
     
-    @staticmethod
-    def _process_tags(words , text , root_tag):
-        text_cache = LangSegment._text_cache
-        segments = re.split(LangSegment.PARSE_TAG, text)
+    def _collect(self , ctx , text , texts):
+        # 与 _process_tags/_parse_language 相同的遍历，只收集需要模型的片段，不依赖识别结果
+        # Same walk as _process_tags/_parse_language, only collecting the fragments that need the model; it does not depend on any result
+        text_cache = ctx.text_cache
+        for segment in self.PARSE_TAG.split(text):
+            if self.PARSE_TAG.match(segment):
+                process , data = text_cache[segment]
+                if process is not Segmenter._process_quotes:continue
+                tag , match , _ = data
+                quote = "".join(match)
+                cleans_text = self._cleans_text(match[1])
+                if self.PARSE_TAG.search(quote):self._collect(ctx , quote , texts)
+                elif len(cleans_text) <= 3:self._collect(ctx , quote , texts)
+                elif self._script_language(cleans_text , ctx.langs) is None:texts[cleans_text] = None
+                continue
+            fragments = ctx.fragments[segment] = self._split_fragments(segment)
+            for fragment , EOS , cleans_text in fragments:
+                if len(cleans_text) > 0 and self._script_language(cleans_text , ctx.langs) is None:texts[cleans_text] = None
+        return texts
+
+    def _prefetch(self , ctx , text):
+        # 批量识别：先收集整段文本中需要模型的片段，一次打分；zh|ja 上下文规则仍在随后的逐段处理中执行
+        # Batch classification: collect every fragment that needs the model first and score them together;
+        # the zh|ja context rules still run in the per-fragment pass that follows
+        ctx.prefetch = None
+        ctx.fragments = None
+        if len(text) < self.PREFETCH_CHARS:return
+        ctx.fragments = {}
+        texts = list(self._collect(ctx , text , {}))
+        if len(texts) < self.PREFETCH_MIN:return
+        stats = ctx.stats
+        if stats is not None:start = perf_counter()
+        results = model.classify_batch(texts , ctx.langs)
+        ctx.prefetch = {cleans_text:language for cleans_text , (language , _) in zip(texts , results)}
+        if stats is not None:stats.classify += perf_counter() - start
+        pass
+
+    def _process_tags(self , ctx , words , text , root_tag , eos=True , base=None):
+        text_cache = ctx.text_cache
+        origin = self._offset_map(ctx , text , base) if base is not None else None
+        position = 0
+        segments = self.PARSE_TAG.split(text)
         segments_len = len(segments) - 1
         for index , text in enumerate(segments):
-            if root_tag:LangSegment._lang_eos = index >= segments_len
-            if LangSegment.PARSE_TAG.match(text):
+            if root_tag:ctx.lang_eos = eos and index >= segments_len
+            if self.PARSE_TAG.match(text):
                 process , data = text_cache[text]
-                if process:process(words , data)
+                if process:process(self , ctx , words , data)
             else:
-                LangSegment._parse_language(words , text)
+                self._parse_language(ctx , words , text , origin(position) if origin is not None else None)
+            position += len(text)
             pass
+        if root_tag and eos and len(ctx.text_waits) > 0:
+            # 输入结束时仍在等待上下文的片段（如引号内占位符之后的文本）按首选语种保存，而不是丢弃
+            # Fragments still waiting for context at the end of the input (e.g. text after a placeholder
+            # inside quotes) are kept under their first candidate language instead of being dropped
+            for data in ctx.text_waits:
+                span = (data.start , data.end) if data.start is not None else None
+                # 全是标点的输入没有可沿用的语种，按中文保存 , input made only of punctuation has no language to follow and is saved as zh
+                self._saveData(ctx , words , data.lang.split("|")[0] or ctx.lang_last or "zh" , data.text , span)
+            ctx.text_waits = []
         return words
     
+    def _symbols(self , ctx , text , whole=True):
+        # 按符号规则表替换为占位符，返回占位符文本与原文起点（仅 getSpans）
+        # Apply the symbol rule table, returning the placeholder text and the original base offset (getSpans only)
+        ctx.lang_eos = False
+        ctx.text_cache = {}
+        base = None
+        if ctx.offsets is not None:ctx.offsets , base = {} , 0
+        # 语言标签优先，其次是用户词典，之后才是其他规则 , language tags come first, then the user lexicon, then the other rules
+        text = self._pattern_symbols(ctx , SYMBOL_RULES[0] , text , whole)
+        lexicon = self._lexicon
+        if lexicon is not None:text = self._lexicon_symbols(ctx , lexicon , text)
+        for item in SYMBOL_RULES[1:]:
+            text = self._pattern_symbols(ctx , item , text , whole)
+        return text , base
+
+    def _parse_symbols(self , ctx , text , words=None , eos=True , whole=True):
+        # words/eos/whole 允许分段处理时延续上一段的结果与状态，whole 表示本段即为完整输入
+        # words/eos/whole let piecewise callers carry results and state over; whole means the piece is the entire input
+        stats = ctx.stats
+        if stats is not None:start = perf_counter()
+        text , base = self._symbols(ctx , text , whole)
+        if words is None:words = []
+        if stats is None:
+            self._prefetch(ctx , text)
+            return self._process_tags(ctx , words , text , True , eos , base)
+        parsed = perf_counter()
+        stats.symbols += parsed - start
+        self._prefetch(ctx , text)
+        words = self._process_tags(ctx , words , text , True , eos , base)
+        stats.parse += perf_counter() - parsed
+        return words
+
+    def _parse(self , ctx , text , words=None , eos=True , whole=True):
+        # 分词入口：处理埋点与模型统计 , entry point that handles instrumentation and model statistics
+        hook = self._hook
+        if hook is None:
+            words = self._parse_symbols(ctx , text , words , eos , whole)
+            self._add_model_stats(ctx)
+            return words
+        stats = ctx.stats = SegmentStats(len(text))
+        start = perf_counter()
+        words = self._parse_symbols(ctx , text , words , eos , whole)
+        stats.total = perf_counter() - start
+        stats.model_calls , stats.script_hits , stats.context_hits = ctx.model_calls , ctx.script_hits , ctx.context_hits
+        ctx.stats = None
+        self._add_model_stats(ctx)
+        self._call_hook(hook , stats)
+        return words
+
+    @staticmethod
+    def _call_hook(hook , stats):
+        # 回调出错只记录日志，不影响分词结果 , a failing hook is only logged and never breaks the segmentation result
+        try:
+            hook(stats)
+        except Exception:
+            _logger.exception("LangSegment stats hook %r failed" , hook)
+        pass
+
     @staticmethod
-    def _parse_symbols(text):
-        TAG_NUM = "00" # "00" => default channels , "$0" => testing channel
-        TAG_S1,TAG_P1,TAG_P2,TAG_EN,TAG_KO = "$1" ,"$2" ,"$3" ,"$4" ,"$5"
-        process_list = [
-            (  TAG_S1  , re.compile(LangSegment.SYMBOLS_PATTERN) , LangSegment._process_symbol  ),      # Symbol Tag
-            (  TAG_KO  , re.compile('(([【《（(“‘"\']*(\d+\W*\s*)*[\uac00-\ud7a3]+[\W\s]*)+)')  , LangSegment._process_korean  ),      # Korean words
-            (  TAG_NUM , re.compile(r'(\W*\d+\W+\d*\W*\d*)')        , LangSegment._process_number  ),      # Number words, Universal in all languages, Ignore it.
-            (  TAG_EN  , re.compile(r'(([【《（(“‘"\']*[a-zA-Z]+[\W\s]*)+)')    , LangSegment._process_english ),                      # English words
-            (  TAG_P1  , re.compile(r'(["\'])(.*?)(\1)')         , LangSegment._process_quotes  ),      # Regular quotes
-            (  TAG_P2  , re.compile(r'([\n]*[【《（(“‘])([^【《（(“‘’”)）》】]{3,})([’”)）》】][\W\s]*[\n]{,1})')   , LangSegment._process_quotes  ),  # Special quotes, There are left and right.
-        ]
-        LangSegment._lang_eos = False
-        text_cache = LangSegment._text_cache = {}
-        for item in process_list:
-            text = LangSegment._pattern_symbols(item , text)
-        words = LangSegment._process_tags([] , text , True)
-        lang_count = LangSegment._lang_count
+    def _sort_counts(lang_count):
         if lang_count and len(lang_count) > 0:
             lang_count = dict(sorted(lang_count.items(), key=lambda x: x[1], reverse=True))
             lang_count = list(lang_count.items())
-            LangSegment._lang_count = lang_count
-        return words
+        return lang_count
     
-    @staticmethod
-    def setfilters(filters):
+    def setfilters(self, filters):
         # 当过滤器更改时，清除缓存
         # When the filter changes, clear the cache
-        if LangSegment.Langfilters != filters:
-            LangSegment._clears()
-            LangSegment.Langfilters = filters
+        filters = _as_filters(filters)
+        if self.Langfilters != filters:
+            self._clears()
+            self.Langfilters = filters
         pass
        
-    @staticmethod     
-    def getfilters():
-        return LangSegment.Langfilters
+    def getfilters(self):
+        return self.Langfilters
             
     
     @staticmethod
-    def getCounts():
-        lang_count = LangSegment._lang_count
+    def _counts(words, lang_count):
         if lang_count is not None:return lang_count
-        text_langs = LangSegment._text_langs
-        if text_langs is None or len(text_langs) == 0:return [("zh",0)]
+        if words is None or len(words) == 0:return [("zh",0)]
         lang_counts = defaultdict(int)
-        for d in text_langs:lang_counts[d['lang']] += int(len(d['text'])//2) if d['lang'] == "en" else len(d['text'])
+        for d in words:lang_counts[d['lang']] += int(len(d['text'])//2) if d['lang'] == "en" else len(d['text'])
         lang_counts = dict(sorted(lang_counts.items(), key=lambda x: x[1], reverse=True))
         lang_counts = list(lang_counts.items())
-        LangSegment._lang_count = lang_counts
         return lang_counts
-    
-    @staticmethod
-    def getTexts(text:str):
+
+    def getCounts(self):
+        local = self._local
+        lang_count = self._counts(getattr(local, "text_langs", None), getattr(local, "lang_count", None))
+        local.lang_count = lang_count
+        return lang_count
+
+    def _segment(self, text:str, filters, offsets=False, cached=True):
+        if text is None or len(text.strip()) == 0:return [] , None
+        cache = self._cache if cached else None
+        if cache is not None:
+            start = perf_counter()
+            key = (text , tuple(filters) if filters is not None else None)
+            if offsets:key += (True ,)
+            value = cache.get(key)
+            if value is not None:
+                hook = self._hook
+                if hook is not None:
+                    stats = SegmentStats(len(text))
+                    stats.cache_hit = True
+                    stats.total = perf_counter() - start
+                    self._call_hook(hook , stats)
+                return value
+        ctx = _Context(filters)
+        if offsets:ctx.offsets = {}
+        words = self._parse(ctx , text)
+        ctx.lang_count = self._sort_counts(ctx.lang_count)
+        if cache is not None:cache.put(key , words , ctx.lang_count)
+        return words , ctx.lang_count
+
+    def _add_model_stats(self, ctx):
+        with self._stats_lock:
+            stats = self._model_stats
+            stats["model_calls"] += ctx.model_calls
+            stats["script_hits"] += ctx.script_hits
+            stats["context_hits"] += ctx.context_hits
+        ctx.model_calls = ctx.script_hits = ctx.context_hits = 0
+        pass
+
+    def getModelStats(self, reset=False):
+        """
+        功能：模型调用统计。script_hits=由文字直接判定的片段数，context_hits=由上下文规则判定而跳过模型的片段数。
+        Function: Model invocation statistics. script_hits = fragments decided by their script alone,
+        context_hits = fragments decided by the context rules without the model.\n
+        Args:
+            reset (bool): 读取后清零 , reset the counters after reading
+        Returns:
+            dict: {"model_calls","script_hits","context_hits","bypass_ratio"}
+        """
+        with self._stats_lock:
+            stats = dict(self._model_stats)
+            if reset:
+                for key in self._model_stats:self._model_stats[key] = 0
+        total = stats["model_calls"] + stats["script_hits"] + stats["context_hits"]
+        stats["bypass_ratio"] = (total - stats["model_calls"]) / total if total > 0 else 0.0
+        return stats
+
+    def warmup(self, filters=None):
+        """
+        功能：立即加载 py3langid 模型（默认在第一次需要模型时才加载）。fork 之前调用，子进程共享已加载的模型。
+        Function: Load the py3langid model now (by default it loads on first use). Call before forking so workers share it.\n
+        Args:
+            filters (list): 预先准备的过滤器，默认使用本实例的过滤器 , filters to prepare, defaults to this segmenter's
+        """
+        filters = self.Langfilters if filters is None else _as_filters(filters)
+        model.warmup(_Context(filters).langs)
+        pass
+
+    def getTexts(self, text:str, filters=None, options=None):
+        """
+        功能：多语种分词。filters/options 只作用于本次调用，不修改实例的过滤器也不清空缓存，不同过滤器的请求可以并发。
+        Function: Multilingual segmentation. filters/options only apply to this call: the instance filters stay
+        as they are and the cache is kept, so requests with different filters can run concurrently.\n
+        Args:
+            filters (list): 本次调用的过滤器，默认使用实例的过滤器 , filters for this call, defaults to the instance's
+            options (dict): 见 OPTIONS，例如 {"cache": False} , see OPTIONS, e.g. {"cache": False}
+        Returns:
+            list: [{'lang':'zh','text':'?'},...]
+        """
         if text is None or len(text.strip()) == 0:
-            LangSegment._clears()
+            self._clears(False)
             return []
-        # lasts
-        text_langs = LangSegment._text_langs
-        if LangSegment._text_lasts == text and text_langs is not None:return text_langs 
+        filters , cached = self._call_args(filters , options)
+        # lasts：只在关闭结果缓存时使用，开启时由 LRU 缓存处理（计入命中）；保存的是内部的 Segment，每次返回新的字典
+        # lasts: only used without the result cache, which otherwise handles the repeat (and counts the hit);
+        # the internal Segments are kept and fresh dicts are returned every time
+        local = self._local
+        text_langs = getattr(local, "text_langs", None)
+        if cached and self._cache is None and getattr(local, "text_lasts", None) == (text, filters) and text_langs is not None:
+            return todicts(text_langs)
         # parse
-        LangSegment._text_waits = []
-        LangSegment._lang_count = None
-        LangSegment._text_lasts = text
-        text = LangSegment._parse_symbols(text)
-        LangSegment._text_langs = text
-        return text
+        words , lang_count = self._segment(text , filters , False , cached)
+        local.text_lasts = (text, filters)
+        local.text_langs = words
+        local.lang_count = lang_count
+        return todicts(words)
+
+    def getSegments(self, text:str, filters=None, options=None):
+        """
+        功能：同 getTexts，但返回紧凑的 Segment 对象（__slots__），合并不复制字符串；segment.todict() 转换为原格式。
+        Function: Same as getTexts but returns compact Segment objects (__slots__) whose merges do not copy strings;
+        segment.todict() converts back to the legacy format.\n
+        Returns:
+            list: [Segment(lang='zh', text='?'),...]
+        """
+        if text is None or len(text.strip()) == 0:
+            self._clears(False)
+            return []
+        filters , cached = self._call_args(filters , options)
+        words , lang_count = self._segment(text , filters , False , cached)
+        local = self._local
+        local.text_lasts = None
+        local.text_langs = words
+        local.lang_count = lang_count
+        return words
+
+    def getSpans(self, text:str, filters=None, options=None):
+        """
+        功能：同 getTexts，但每个结果附带其在原文中的位置，text[start:end] 即为该结果的原始文本（不含被去掉的语言标签，结果之间可能留有空隙；合并结果覆盖合并的整段）。
+        Function: Same as getTexts, but every result carries its offsets in the original string; text[start:end]
+        is the source of that result (stripped language tags are excluded, so spans may leave gaps between
+        results; a merged result covers the whole merged range).\n
+        Returns:
+            list: [(start , end , lang , normalized_text),...]
+        """
+        if text is None or len(text.strip()) == 0:
+            self._clears(False)
+            return []
+        filters , cached = self._call_args(filters , options)
+        words , lang_count = self._segment(text , filters , True , cached)
+        local = self._local
+        local.text_lasts = None
+        local.text_langs = words
+        local.lang_count = lang_count
+        return [data.span() for data in words]
+
+    def getTextsBatch(self, texts, workers=None, chunksize=64, filters=None):
+        """
+        功能：批量分词，使用进程池并行处理，结果保持输入顺序。
+        Function: Batch segmentation on a process pool, results keep the input order.\n
+        Args:
+            texts (iterable): 文本序列 , text lines
+            workers (int): 进程数，默认为CPU核数，<=1 时在当前进程处理 , number of processes, defaults to the CPU count, <=1 runs in-process
+            chunksize (int): 每次派发给进程的文本数 , texts sent to a worker per task
+            filters (list): 本次调用的过滤器，默认使用实例的过滤器 , filters for this call, defaults to the instance's
+        Returns:
+            list: [(segments , counts),...] , segments同getTexts，counts同getCounts
+        """
+        filters , _ = self._call_args(filters , None)
+        if workers is None:workers = os.cpu_count() or 1
+        if workers <= 1:
+            return [self._batch_item(text , filters) for text in texts]
+        import multiprocessing
+        # fork 方式下先在父进程加载模型，子进程直接共享其内存页面
+        # With fork, load the model in the parent first so the workers share its pages
+        if multiprocessing.get_start_method() == "fork":self.warmup(filters)
+        with multiprocessing.Pool(workers , initializer=_batch_init , initargs=(type(self) , filters , self._lexicon)) as pool:
+            results = list(pool.imap(_batch_segment , texts , chunksize=max(1 , chunksize)))
+            # 正常结束工作进程，使其写入持久化缓存中剩余的条目 , let the workers exit normally so they write the rest of the disk cache
+            pool.close()
+            pool.join()
+            return results
+
+    def _batch_item(self, text:str, filters):
+        words , lang_count = self._segment(text , filters)
+        return todicts(words) , self._counts(words , lang_count)
+
+    def _batch_items(self, items):
+        """
+        功能：一次处理多条 (文本 , 过滤器)（过滤器为 None 时使用实例的过滤器），所有文本中需要模型的片段按语种集合合并打分，供服务端的微批调度使用。不调用埋点回调。
+        Function: Segment several (text , filters) at once, scoring the fragments that need the model together
+        per language set; used by the server's micro-batching. The stats hook is not called.\n
+        Returns:
+            list: [(segments , counts),...] 同 _batch_item , same as _batch_item
+        """
+        results = [None] * len(items)
+        pending , groups = [] , {}
+        cache = self._cache
+        for index , (text , filters) in enumerate(items):
+            if text is None or len(text.strip()) == 0:
+                results[index] = ([] , self._counts(None , None))
+                continue
+            filters , _ = self._call_args(filters , None)
+            key = (text , tuple(filters) if filters is not None else None)
+            value = cache.get(key) if cache is not None else None
+            if value is not None:
+                words , lang_count = value
+                results[index] = (todicts(words) , self._counts(words , lang_count))
+                continue
+            ctx = _Context(filters)
+            text , _ = self._symbols(ctx , text)
+            ctx.fragments = {}
+            self._collect(ctx , text , groups.setdefault(ctx.langs , {}))
+            pending.append((index , key , ctx , text))
+        prefetch = {}
+        for langs , texts in groups.items():
+            if len(texts) == 0:continue
+            texts = list(texts)
+            results_langs = model.classify_batch(texts , langs)
+            prefetch[langs] = {cleans_text:language for cleans_text , (language , _) in zip(texts , results_langs)}
+        for index , key , ctx , text in pending:
+            ctx.prefetch = prefetch.get(ctx.langs)
+            words = self._process_tags(ctx , [] , text , True)
+            self._add_model_stats(ctx)
+            lang_count = self._sort_counts(ctx.lang_count)
+            if cache is not None:cache.put(key , words , lang_count)
+            results[index] = (todicts(words) , self._counts(words , lang_count))
+        return results
+
+    def classify(self, text:str):
+        return self.getTexts(text)
+
+
+# 符号规则表：按顺序替换为占位符，导入时预编译
+# Symbol rule table: applied in order as placeholders, precompiled at import time
+TAG_NUM = "00" # "00" => default channels , "$0" => testing channel
+TAG_S1,TAG_P1,TAG_P2,TAG_EN,TAG_KO = "$1" ,"$2" ,"$3" ,"$4" ,"$5"
+TAG_LEX = "$6" # 用户词典，不在规则表中 , user lexicon, not part of the rule table
+SYMBOL_RULES = (
+    (  TAG_S1  , re.compile(Segmenter.SYMBOLS_PATTERN) , Segmenter._process_symbol  ),      # Symbol Tag
+    (  TAG_KO  , re.compile(rf'(([【《（(“‘"\']*(\d+\W*\s*)*[{_char_class(HANGUL_RANGES)}]+[\W\s]*)+)')  , Segmenter._process_korean  ),      # Korean words
+    (  TAG_NUM , re.compile(r'(\W*\d+\W+\d*\W*\d*)')        , Segmenter._process_number  ),      # Number words, Universal in all languages, Ignore it.
+    (  TAG_EN  , re.compile(r'(([【《（(“‘"\']*[a-zA-Z]+[\W\s]*)+)')    , Segmenter._process_english ),                      # English words
+    (  TAG_P1  , re.compile(r'(["\'])(.*?)(\1)')         , Segmenter._process_quotes  ),      # Regular quotes
+    (  TAG_P2  , re.compile(r'([\n]*[【《（(“‘])([^【《（(“‘’”)）》】]{3,})([’”)）》】][\W\s]*[\n]{,1})')   , Segmenter._process_quotes  ),  # Special quotes, There are left and right.
+)
+
+
+# 默认分词器，供模块级接口使用
+# Default segmenter used by the module level functions
+_segmenter = Segmenter()
+
+# 批量分词的进程内分词器，每个进程只创建一次并预加载模型
+# Per-process segmenter for batch work, created once per worker with the model preloaded
+_batch_segmenter = None
+
+def _batch_init(cls , filters , lexicon=None):
+    global _batch_segmenter
+    _batch_segmenter = cls(filters , lexicon=lexicon)
+    _batch_segmenter.warmup(filters)
+    pass
+
+def _batch_segment(text):
+    segmenter = _batch_segmenter
+    return segmenter._batch_item(text , segmenter.Langfilters)
+
+
+class LangSegment():
+    """
+    兼容旧版本的静态接口，内部委托给默认分词器。
+    Legacy static interface, delegating to the default segmenter.
+    """
+
+    SYMBOLS_PATTERN = Segmenter.SYMBOLS_PATTERN
+    PARSE_TAG = Segmenter.PARSE_TAG
+    Langfilters = Segmenter.Langfilters
+
+    @staticmethod
+    def _sync():
+        # 兼容直接修改 LangSegment.Langfilters 的写法
+        # Compatible with assigning LangSegment.Langfilters directly
+        _segmenter.setfilters(LangSegment.Langfilters)
+        return _segmenter
+
+    @staticmethod
+    def setfilters(filters):
+        LangSegment.Langfilters = filters
+        _segmenter.setfilters(filters)
+        pass
+
+    @staticmethod
+    def getfilters():
+        return LangSegment._sync().getfilters()
+
+    @staticmethod
+    def getCounts():
+        return LangSegment._sync().getCounts()
+    
+    @staticmethod
+    def getTexts(text:str, filters=None, options=None):
+        return LangSegment._sync().getTexts(text , filters , options)
+
+    @staticmethod
+    def setcache(max_entries=1024, max_bytes=None):
+        _segmenter.setcache(max_entries, max_bytes)
+        pass
+
+    @staticmethod
+    def getCacheStats():
+        return _segmenter.getCacheStats()
+
+    @staticmethod
+    def setdiskcache(path, max_entries=1000000):
+        model.setstore(DiskCache(path , max_entries , model_version()) if path else None)
+        pass
+
+    @staticmethod
+    def getDiskCacheStats():
+        store = model.store
+        return store.stats() if store is not None else None
+
+    @staticmethod
+    def getModelStats(reset=False):
+        return _segmenter.getModelStats(reset)
+
+    @staticmethod
+    def sethook(hook):
+        _segmenter.sethook(hook)
+        pass
+
+    @staticmethod
+    def setlexicon(lexicon):
+        _segmenter.setlexicon(lexicon)
+        pass
+
+    @staticmethod
+    def getlexicon():
+        return _segmenter.getlexicon()
+
+    @staticmethod
+    def getSegments(text:str, filters=None, options=None):
+        return LangSegment._sync().getSegments(text , filters , options)
+
+    @staticmethod
+    def getSpans(text:str, filters=None, options=None):
+        return LangSegment._sync().getSpans(text , filters , options)
+
+    @staticmethod
+    def getTextsBatch(texts , workers=None , chunksize=64 , filters=None):
+        return LangSegment._sync().getTextsBatch(texts , workers , chunksize , filters)
     
     @staticmethod
     def classify(text:str):
-        return LangSegment.getTexts(text)
+        return LangSegment._sync().classify(text)
+
+    @staticmethod
+    def warmup():
+        LangSegment._sync().warmup()
+        pass
+
+    @staticmethod
+    def exportModel(path):
+        model.save(path)
+        pass
+
+    @staticmethod
+    def loadModel(path, mmap=True):
+        model.load(path, mmap)
+        pass
 
 def setfilters(filters):
     """
@@ -416,6 +1152,120 @@ def getfilters():
     """
     return LangSegment.getfilters()
 
+def setcache(max_entries=1024 , max_bytes=None):
+    """
+    功能：开启 LRU 结果缓存（默认关闭），按 (文本, 过滤器) 缓存，过滤器更改时自动清除。
+    Function: Enable the LRU result cache (off by default), keyed by (text, filters) and cleared when the filters change.\n
+    Args:
+        max_entries (int): 最大条目数，0为关闭 , max entries, 0 disables the cache
+        max_bytes (int): 估算字节上限，None为不限 , estimated byte limit, None for unlimited
+    """
+    LangSegment.setcache(max_entries , max_bytes)
+    pass
+
+def getCacheStats():
+    """
+    功能：LRU 结果缓存统计，未开启时返回 None。
+    Function: LRU result cache statistics, None when the cache is disabled.\n
+    Returns:
+        dict: {"hits","misses","entries","bytes","max_entries","max_bytes"}
+    """
+    return LangSegment.getCacheStats()
+
+def setdiskcache(path , max_entries=1000000):
+    """
+    功能：开启持久化的语种识别缓存（sqlite，默认关闭），按 (模型版本, 语种集合, 片段文本) 保存，重新处理语料时命中磁盘而不调用模型。
+    多个进程可共用同一个文件；模型版本变化时旧结果自动作废。
+    Function: Enable the persistent classification cache (sqlite, off by default), keyed by (model version,
+    language set, fragment text), so corpus reruns hit the disk instead of the model. Processes can share
+    one file; results of another model version are dropped automatically.\n
+    Args:
+        path (str): sqlite 文件路径，None 为关闭 , sqlite file path, None turns it off
+        max_entries (int): 最大条目数，超出时按最近使用时间淘汰 , max entries, evicted by last use beyond it
+    """
+    LangSegment.setdiskcache(path , max_entries)
+    pass
+
+def getDiskCacheStats():
+    """
+    功能：持久化识别缓存统计，未开启时返回 None。
+    Function: Persistent classification cache statistics, None when it is off.\n
+    Returns:
+        dict: {"hits","misses","entries","pending","max_entries","version"}
+    """
+    return LangSegment.getDiskCacheStats()
+
+def getModelStats(reset=False):
+    """
+    功能：模型调用统计，用于观察有多少片段绕过了 py3langid 模型。
+    Function: Model invocation statistics, showing how many fragments bypassed the py3langid model.\n
+    Returns:
+        dict: {"model_calls","script_hits","context_hits","bypass_ratio"}
+    """
+    return LangSegment.getModelStats(reset)
+
+def sethook(hook):
+    """
+    功能：设置埋点回调，每次分词后以 SegmentStats 调用（各阶段耗时、片段数、模型调用、缓存命中），None 为关闭。
+    Function: Set the stats callback, called with a SegmentStats after every call
+    (stage timings, fragments, model invocations, cache hits); None disables it.\n
+    Args:
+        hook (callable): hook(stats) , 例如 LangSegment.StatsCollector() , e.g. LangSegment.StatsCollector()
+    """
+    LangSegment.sethook(hook)
+    pass
+
+def setlexicon(lexicon):
+    """
+    功能：设置用户词典（默认关闭）。品牌名、产品名、人名等词条直接使用指定的语种（及读音文本），跳过语种识别，
+    不必在文本中加 <ja>…</ja> 标签；语言标签优先于词典。修改词典后需再次调用，以清除结果缓存。
+    Function: Set the user lexicon (off by default). Terms such as brand, product and person names take the
+    given language (and pronunciation text) directly and skip classification, with no inline <ja>…</ja>
+    tags needed; language tags take precedence over the lexicon. Call it again after changing the lexicon
+    so the result cache is cleared.\n
+    Args:
+        lexicon (Lexicon|dict|str): LangSegment.Lexicon、{"iPhone": "en", "佐々木": ("ja", "ささき")} 或词典文件路径（每行：词条<TAB>语种[<TAB>读音]），None 为关闭
+            a LangSegment.Lexicon, a dict as shown, or a lexicon file path (one term<TAB>lang[<TAB>pronunciation] per line); None disables it
+    """
+    LangSegment.setlexicon(lexicon)
+    pass
+
+def getlexicon():
+    """
+    功能：当前的用户词典，未设置时返回 None。
+    Function: The current user lexicon, None when unset.
+    """
+    return LangSegment.getlexicon()
+
+def warmup():
+    """
+    功能：预加载模型。默认在第一次需要模型时才加载，以加快 import 速度；服务启动或 fork 子进程之前可调用它。
+    Function: Preload the model. It normally loads on first use to keep imports fast;
+    call this at service start-up or before forking worker processes.
+    """
+    LangSegment.warmup()
+    pass
+
+def exportModel(path):
+    """
+    功能：将 py3langid 模型导出为 path 目录下的平铺 .npy 数组，供 loadModel 或环境变量 LANGSEGMENT_MODEL 使用。
+    Function: Export the py3langid model as flat .npy arrays in the directory path, for loadModel or the LANGSEGMENT_MODEL environment variable.
+    """
+    LangSegment.exportModel(path)
+    pass
+
+def loadModel(path, mmap=True):
+    """
+    功能：加载 exportModel 导出的模型。mmap=True 时以内存映射方式加载，多个工作进程共享同一份物理内存，启动无需解压。
+    Function: Load a model exported by exportModel. With mmap=True it is memory-mapped, so worker processes
+    share one physical copy and start without decompressing.\n
+    Args:
+        path (str): exportModel 的导出目录 , directory written by exportModel
+        mmap (bool): 内存映射加载 , memory-map the arrays
+    """
+    LangSegment.loadModel(path, mmap)
+    pass
+
 # @Deprecated：Use shorter setfilters
 def setLangfilters(filters):
     """
@@ -429,17 +1279,55 @@ def getLangfilters():
     """
     return getfilters()
     
-def getTexts(text:str):
+def getTexts(text:str , filters=None , options=None):
     """
     功能：对输入的文本进行多语种分词\n 
     Feature: Tokenizing multilingual text input.\n 
     参数-Args:
         text (str): Text content,文本内容\n
+        filters (list): 仅本次调用的过滤器，不修改全局过滤器 , filters for this call only, the global ones are untouched\n
+        options (dict): 本次调用的选项，例如 {"cache": False} , options for this call, e.g. {"cache": False}\n
     返回-Returns:
         list: 示例结果：[{'lang':'zh','text':'?'},...]\n
         lang=语种 , text=内容\n
     """
-    return LangSegment.getTexts(text)
+    return LangSegment.getTexts(text , filters , options)
+
+def getSegments(text:str , filters=None , options=None):
+    """
+    功能：多语种分词，返回紧凑的 Segment 对象，适合大规模语料；segment.todict() 或 todicts() 转换为 getTexts 的格式\n
+    Feature: Multilingual tokenizing returning compact Segment objects, for corpus scale work;
+    segment.todict() or todicts() converts to the getTexts format.\n
+    返回-Returns:
+        list: [Segment(lang='zh', text='?'),...]\n
+    """
+    return LangSegment.getSegments(text , filters , options)
+
+def getSpans(text:str , filters=None , options=None):
+    """
+    功能：多语种分词，返回每个结果在原文中的位置，便于 TTS 对齐与字幕计时，无需再回原文查找\n
+    Feature: Multilingual tokenizing that returns where each result sits in the original string,
+    for TTS alignment and subtitle timing without searching the original text again.\n
+    返回-Returns:
+        list: [(start , end , lang , normalized_text),...]\n
+        text[start:end] = 原始文本 , the original source of the result\n
+    """
+    return LangSegment.getSpans(text , filters , options)
+
+def getTextsBatch(texts , workers=None , chunksize=64 , filters=None):
+    """
+    功能：批量多语种分词，使用进程池并行处理，适合大规模语料预处理\n
+    Feature: Batch multilingual tokenizing on a process pool, for large corpora.\n
+    参数-Args:
+        texts (iterable): 文本序列 , text lines\n
+        workers (int): 进程数，默认为CPU核数 , number of processes, defaults to the CPU count\n
+        chunksize (int): 每次派发给进程的文本数 , texts sent to a worker per task\n
+        filters (list): 仅本次调用的过滤器 , filters for this call only\n
+    返回-Returns:
+        list: 按输入顺序的结果：[(segments , counts),...]\n
+        segments=[{'lang':'zh','text':'?'},...] , counts=[('zh', 5),...]\n
+    """
+    return LangSegment.getTextsBatch(texts , workers , chunksize , filters)
 
 def getCounts():
     """
@@ -1,4 +1,28 @@
-from .LangSegment import LangSegment,getTexts,classify,getCounts,printList,setLangfilters,getLangfilters,setfilters,getfilters
+from .LangSegment import LangSegment,Segmenter,getTexts,getSegments,getSpans,getTextsBatch,classify,getCounts,printList,setLangfilters,getLangfilters,setfilters,getfilters,setcache,getCacheStats,setdiskcache,getDiskCacheStats,getModelStats,sethook,setlexicon,getlexicon,warmup,exportModel,loadModel
+from .instrument import SegmentStats,StatsCollector
+from .lexicon import Lexicon
+from .segment import Segment,todicts
+
+# 可选模块按需导入（asyncio 等导入较慢），保持 import LangSegment 轻量
+# Optional modules are imported on first access (asyncio and friends are slow to import), keeping `import LangSegment` light
+_LAZY = {
+    "StreamSegmenter": ".stream", "getTextsStream": ".stream", "getTextsChunked": ".stream",
+    "AsyncSegmenter": ".aio", "agetTexts": ".aio", "agetTextsBatch": ".aio", "setExecutor": ".aio",
+    "IncrementalSegmenter": ".incremental",
+    "SegmentServer": ".server", "MicroBatcher": ".server",
+    "profile": ".profiling", "Profiler": ".profiling", "profileTexts": ".profiling",
+}
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+    value = getattr(importlib.import_module(module , __name__) , name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
 
 # release
 __version__ = '0.2.0'
@@ -0,0 +1,142 @@
+"""
+命令行分词：从标准输入或文件流式读取文本 / JSONL，逐行分词后以 JSONL 输出，内存占用有界，适合大规模语料预处理。
+Command-line segmentation: streams text or JSONL from stdin or files and writes one JSONL record per
+input line with bounded memory, so multi-gigabyte corpora can be processed in a pipeline.
+
+    python -m LangSegment corpus.txt -o segments.jsonl
+    cat manifest.jsonl | python -m LangSegment --jsonl --field text -f zh,ja,en -w 8 > out.jsonl
+    python -m LangSegment corpus.txt -o /dev/null --profile segment.folded    # 剖析 , profiling
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+from collections import defaultdict
+from itertools import islice
+
+from .LangSegment import Segmenter, setdiskcache, getlexicon, _batch_init, _batch_segment
+from .lexicon import Lexicon
+
+
+def _open_inputs(paths):
+    # "-" 或未指定时读取标准输入 , "-" or no path reads stdin
+    for path in paths or ["-"]:
+        if path == "-":
+            yield "<stdin>" , io.TextIOWrapper(sys.stdin.buffer , encoding="utf-8" , errors="replace")
+        else:
+            with open(path , encoding="utf-8" , errors="replace") as f:yield path , f
+
+def read_records(paths , jsonl=False , field="text"):
+    """
+    功能：逐行读取输入，产出 (记录 , 文本)；文本模式下记录为 None，JSONL 模式跳过空行。
+    Function: Read the inputs line by line and yield (record , text); the record is None for plain text,
+    blank lines are skipped in JSONL mode.
+    """
+    for name , f in _open_inputs(paths):
+        for number , line in enumerate(f , 1):
+            line = line.rstrip("\r\n")
+            if not jsonl:
+                yield None , line
+                continue
+            if len(line.strip()) == 0:continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                raise SystemExit(f"{name}:{number}: invalid JSON: {e}")
+            if not isinstance(record , dict) or not isinstance(record.get(field) , str):
+                raise SystemExit(f"{name}:{number}: missing text field {field!r}")
+            yield record , record[field]
+
+def segment_records(records , filters , workers=1 , chunksize=64 , lexicon=None):
+    """
+    功能：按输入顺序产出 (记录 , 文本 , 分词结果 , 语种统计)。每次只读入有限的一批，内存占用与语料大小无关。
+    Function: Yield (record , text , segments , counts) in input order. Only a bounded batch is read
+    at a time, so memory does not grow with the corpus.\n
+    Args:
+        lexicon (Lexicon): 用户词典，默认使用 setlexicon 设置的词典 , user lexicon, defaults to the one set by setlexicon
+    """
+    if lexicon is None:lexicon = getlexicon()
+    if workers <= 1:
+        segmenter = Segmenter(filters , lexicon=lexicon)
+        for record , text in records:
+            yield (record , text) + segmenter._batch_item(text , filters)
+        return
+    import multiprocessing
+    # 与 getTextsBatch 相同：fork 方式下先在父进程加载模型 , same as getTextsBatch: with fork, load the model in the parent first
+    if multiprocessing.get_start_method() == "fork":Segmenter(filters).warmup(filters)
+    batch_size = workers * chunksize * 4
+    with multiprocessing.Pool(workers , initializer=_batch_init , initargs=(Segmenter , filters , lexicon)) as pool:
+        while True:
+            batch = list(islice(records , batch_size))
+            if len(batch) == 0:break
+            results = pool.imap(_batch_segment , [text for _ , text in batch] , chunksize=chunksize)
+            for (record , text) , result in zip(batch , results):
+                yield (record , text) + result
+        pool.close()
+        pool.join()
+    pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m LangSegment" , description="LangSegment corpus segmenter, JSONL output")
+    parser.add_argument("inputs" , nargs="*" , help="input files, stdin when omitted or '-'")
+    parser.add_argument("-o" , "--output" , help="output JSONL file, stdout by default")
+    parser.add_argument("--jsonl" , action="store_true" , help="inputs are JSONL records instead of plain text lines")
+    parser.add_argument("--field" , default="text" , help="text field of the JSONL records")
+    parser.add_argument("-f" , "--filters" , default=",".join(Segmenter.Langfilters) , help="comma-separated language filters")
+    parser.add_argument("-w" , "--workers" , type=int , default=1 , help="worker processes, 0 for the CPU count")
+    parser.add_argument("-c" , "--chunksize" , type=int , default=64 , help="lines sent to a worker per task")
+    parser.add_argument("--counts" , help="write the total language counts to a JSON file")
+    parser.add_argument("--lexicon" , help="user lexicon file, one term<TAB>lang[<TAB>pronunciation] per line")
+    parser.add_argument("--disk-cache" , help="persistent classification cache (sqlite file) shared by reruns")
+    parser.add_argument("--profile" , metavar="FOLDED" , help="profile the run in-process, write collapsed stacks for flamegraph tools and print stage timings to stderr")
+    parser.add_argument("--profile-mode" , choices=("cprofile" , "sample") , default="cprofile" , help="deterministic cProfile or a low-overhead sampling profiler")
+    options = parser.parse_args(argv)
+
+    filters = [item for item in options.filters.split(",") if item]
+    workers = options.workers if options.workers > 0 else (os.cpu_count() or 1)
+    if options.disk_cache:setdiskcache(options.disk_cache)
+    lexicon = Lexicon().load(options.lexicon) if options.lexicon else None
+    profiler = None
+    if options.profile:
+        from .profiling import Profiler
+        # 剖析只覆盖当前进程，模型在剖析开始前加载 , profiling only covers this process, the model loads before it starts
+        workers = 1
+        Segmenter(filters).warmup(filters)
+        profiler = Profiler(options.profile_mode).start()
+    records = read_records(options.inputs , options.jsonl , options.field)
+    if options.output:
+        output = open(options.output , "w" , encoding="utf-8")
+    else:
+        output = io.TextIOWrapper(sys.stdout.buffer , encoding="utf-8" , newline="\n" , line_buffering=False)
+    totals = defaultdict(int)
+    try:
+        for record , text , segments , counts in segment_records(records , filters , workers , max(1 , options.chunksize) , lexicon):
+            # JSONL 模式保留原记录的其他字段 , JSONL mode keeps the other fields of the record
+            if record is None:record = {"text": text}
+            record["segments"] = segments
+            record["counts"] = counts
+            output.write(json.dumps(record , ensure_ascii=False))
+            output.write("\n")
+            for lang , count in counts:totals[lang] += count
+    except BrokenPipeError:
+        # 下游提前关闭（例如 | head）, the reader went away early (e.g. | head)
+        os.dup2(os.open(os.devnull , os.O_WRONLY) , sys.stdout.fileno())
+        return 1
+    finally:
+        if options.output:output.close()
+        else:output.detach()
+        if profiler is not None:
+            profiler.stop()
+            profiler.write_collapsed(options.profile)
+            print(profiler.report() , file=sys.stderr)
+    if options.counts:
+        totals = sorted(totals.items() , key=lambda item:item[1] , reverse=True)
+        with open(options.counts , "w" , encoding="utf-8") as f:json.dump(dict(totals) , f , ensure_ascii=False , indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+"""
+asyncio 接口：将分词放到执行器中运行，不阻塞事件循环；相同的并发请求只分词一次。
+asyncio interface: segmentation runs on an executor so the event loop is never blocked,
+and identical concurrent requests are segmented only once.
+"""
+
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+
+from .LangSegment import _segmenter
+
+
+# 进程池中每个进程的分词器与词典。词典只按 (uid , version) 传递，进程首次遇到时才发送完整词条
+# Per-process segmenters and lexicons for process pools. Lexicons travel as (uid , version) only;
+# the full entries are sent the first time a worker has not seen that version
+_process_segmenters = {}
+_process_lexicons = {}
+
+class _LexiconMissing(Exception):
+    pass
+
+def _process_items(cls , filters , texts , lexicon_key=None , lexicon=None):
+    if lexicon is not None:
+        # 同一词典的旧版本不再需要 , older versions of the same lexicon are no longer needed
+        for key in [key for key in _process_lexicons if key[0] == lexicon_key[0]]:del _process_lexicons[key]
+        for key in [key for key in _process_segmenters if key[2] is not None and key[2][0] == lexicon_key[0]]:
+            del _process_segmenters[key]
+        _process_lexicons[lexicon_key] = lexicon
+    if lexicon_key is not None and lexicon_key not in _process_lexicons:raise _LexiconMissing(lexicon_key)
+    key = (cls , tuple(filters) if filters is not None else None , lexicon_key)
+    segmenter = _process_segmenters.get(key)
+    if segmenter is None:
+        lexicon = _process_lexicons.get(lexicon_key) if lexicon_key is not None else None
+        segmenter = _process_segmenters[key] = cls(filters , lexicon=lexicon)
+    return [segmenter._batch_item(text , filters) for text in texts]
+
+
+class AsyncSegmenter():
+    """
+    异步分词器：包装一个 Segmenter，在执行器中运行，并合并相同的并发请求。
+    Async segmenter: wraps a Segmenter, runs it on an executor and coalesces identical concurrent requests.
+    """
+
+    def __init__(self, segmenter=None, executor=None):
+        """
+        Args:
+            segmenter (Segmenter): 使用的分词器，默认为模块默认实例 , segmenter to use, defaults to the module one
+            executor (Executor): 执行器，None 为事件循环默认线程池 , executor, None for the loop's default thread pool
+        """
+        self.segmenter = segmenter if segmenter is not None else _segmenter
+        self.executor = executor
+        # 进行中的请求：key -> [future , waiters]
+        # In-flight requests: key -> [future , waiters]
+        self._inflight = {}
+        pass
+
+    def _submit(self , loop , filters , texts):
+        executor = self.executor
+        if isinstance(executor , ProcessPoolExecutor):
+            return asyncio.ensure_future(self._process_submit(loop , executor , filters , texts))
+        segmenter = self.segmenter
+        return loop.run_in_executor(executor , lambda:[segmenter._batch_item(text , filters) for text in texts])
+
+    async def _process_submit(self , loop , executor , filters , texts):
+        cls = type(self.segmenter)
+        lexicon = self.segmenter.getlexicon()
+        if lexicon is None:return await loop.run_in_executor(executor , _process_items , cls , filters , texts)
+        key = (lexicon.uid , lexicon.version)
+        try:
+            return await loop.run_in_executor(executor , _process_items , cls , filters , texts , key)
+        except _LexiconMissing:
+            # 该进程还没有这个版本的词典：只在这时发送完整词条
+            # The worker has not seen this lexicon version yet: only now send the full entries
+            return await loop.run_in_executor(executor , _process_items , cls , filters , texts , key , lexicon)
+
+    @staticmethod
+    def _copy(value):
+        words , counts = value
+        return [dict(data) for data in words] , list(counts)
+
+    async def _item(self , text , filters):
+        loop = asyncio.get_running_loop()
+        key = (loop , text , tuple(filters) if filters is not None else None)
+        entry = self._inflight.get(key)
+        if entry is None:
+            future = self._submit(loop , filters , [text])
+            entry = self._inflight[key] = [future , 0]
+            future.add_done_callback(lambda _:self._inflight.pop(key , None))
+        future = entry[0]
+        entry[1] += 1
+        try:
+            # shield：一个等待者取消不会影响其它等待者
+            # shield: one waiter cancelling does not cancel the others
+            value = await asyncio.shield(future)
+        except asyncio.CancelledError:
+            entry[1] -= 1
+            # 最后一个等待者取消时，取消尚未开始的任务
+            # When the last waiter cancels, cancel the work if it has not started yet
+            if entry[1] <= 0:future.cancel()
+            raise
+        entry[1] -= 1
+        return self._copy(value[0])
+
+    async def getTexts(self , text:str , timeout=None , filters=None):
+        """
+        功能：异步多语种分词，结果同 getTexts。
+        Function: Async multilingual segmentation, same result as getTexts.\n
+        Args:
+            text (str): 文本内容 , text content
+            timeout (float): 超时秒数，超时抛出 asyncio.TimeoutError , timeout in seconds, raises asyncio.TimeoutError
+            filters (list): 本次调用的过滤器，默认使用分词器的过滤器 , filters for this call, defaults to the segmenter's
+        """
+        if text is None or len(text.strip()) == 0:return []
+        filters , _ = self.segmenter._call_args(filters , None)
+        words , counts = await asyncio.wait_for(self._item(text , filters) , timeout)
+        return words
+
+    async def getTextsBatch(self , texts , timeout=None , chunksize=64 , filters=None):
+        """
+        功能：异步批量分词，按块提交到执行器，结果保持输入顺序，重复文本只处理一次。
+        Function: Async batch segmentation submitted in chunks, keeping the input order; duplicate texts run once.\n
+        Returns:
+            list: [(segments , counts),...]
+        """
+        texts = list(texts)
+        filters , _ = self.segmenter._call_args(filters , None)
+        unique = list(dict.fromkeys(texts))
+        loop = asyncio.get_running_loop()
+        chunksize = max(1 , chunksize)
+        futures = [self._submit(loop , filters , unique[i:i + chunksize]) for i in range(0 , len(unique) , chunksize)]
+        try:
+            chunks = await asyncio.wait_for(asyncio.gather(*futures) , timeout)
+        except (asyncio.CancelledError , asyncio.TimeoutError):
+            for future in futures:future.cancel()
+            raise
+        results = {}
+        for chunk_texts , values in zip((unique[i:i + chunksize] for i in range(0 , len(unique) , chunksize)) , chunks):
+            results.update(zip(chunk_texts , values))
+        return [self._copy(results[text]) for text in texts]
+
+
+# 默认异步分词器，供模块级接口使用
+# Default async segmenter used by the module level functions
+_async_segmenter = AsyncSegmenter()
+
+def setExecutor(executor):
+    """
+    功能：设置模块级异步接口使用的执行器，None 为事件循环默认线程池。
+    Function: Set the executor used by the module level async functions, None for the loop's default thread pool.
+    """
+    _async_segmenter.executor = executor
+    pass
+
+async def agetTexts(text:str , timeout=None , filters=None):
+    """
+    功能：异步多语种分词，不阻塞事件循环\n
+    Feature: Async multilingual tokenizing without blocking the event loop.\n
+    参数-Args:
+        text (str): 文本内容 , text content\n
+        timeout (float): 超时秒数 , timeout in seconds\n
+        filters (list): 仅本次调用的过滤器 , filters for this call only\n
+    返回-Returns:
+        list: [{'lang':'zh','text':'?'},...]\n
+    """
+    return await _async_segmenter.getTexts(text , timeout , filters)
+
+async def agetTextsBatch(texts , timeout=None , chunksize=64 , filters=None):
+    """
+    功能：异步批量多语种分词，结果按输入顺序\n
+    Feature: Async batch multilingual tokenizing, results keep the input order.\n
+    返回-Returns:
+        list: [(segments , counts),...]\n
+    """
+    return await _async_segmenter.getTextsBatch(texts , timeout , chunksize , filters)
@@ -0,0 +1,233 @@
+"""
+性能基准：离线生成中日英韩混合语料，测量 getTexts 的吞吐、延迟、内存峰值与模型调用次数。
+Benchmark: generates zh/ja/en/ko mixed corpora offline and measures getTexts throughput,
+latency, peak memory and model call counts, plus the cold `import LangSegment` time.
+
+    python -m LangSegment.benchmark
+    python -m LangSegment.benchmark --save baseline.json
+    python -m LangSegment.benchmark --compare baseline.json --tolerance 0.15
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from .LangSegment import Segmenter
+
+
+# 语料素材 , corpus material
+ZH_PHRASES = [
+    "我喜欢在雨天里听音乐", "语种分词是语音合成必不可少的环节", "此次发布会带来了新的系列机型",
+    "你今天学习日语了吗", "这次的屏幕采用了新的技术", "欢迎来玩", "我们明天去海边度假",
+    "请把文件发给我", "这个价格非常合理", "他说的话很有道理", "天气预报说明天会下雪",
+]
+JA_PHRASES = [
+    "雨の日に音楽を聴くのが好きです", "春は桜の季節です", "あなたの体育の先生は誰ですか",
+    "明日、私たちは海辺にバカンスに行きます", "言語分詞は音声合成に欠かせない環節である",
+    "東京は日本の首都です", "中国語、話せますか", "昨日は雨が降った",
+]
+EN_PHRASES = [
+    "I enjoy listening to music on rainy days", "Apple Watch", "iPhone", "ChatGPT", "USA",
+    "the new iPad Air uses an LCD screen", "Hello World", "OK", "machine learning",
+]
+KO_PHRASES = [
+    "비 오는 날에 음악을 듣는 것을 즐깁니다", "안녕 오빠", "언니", "감사합니다", "한국어를 공부합니다",
+]
+ENDINGS = ["。", "！", "？", "，", ". ", "! ", "? ", "、", "\n"]
+
+
+def _sentence(rng):
+    pool = rng.choice((ZH_PHRASES , ZH_PHRASES , JA_PHRASES , EN_PHRASES , KO_PHRASES))
+    return rng.choice(pool) + rng.choice(ENDINGS)
+
+def _mixed(rng , min_chars):
+    parts , size = [] , 0
+    while size < min_chars:
+        part = _sentence(rng)
+        parts.append(part)
+        size += len(part)
+    return "".join(parts)
+
+def _tagged(rng , min_chars):
+    parts , size = [] , 0
+    while size < min_chars:
+        lang , pool = rng.choice((("ja" , JA_PHRASES) , ("zh" , ZH_PHRASES) , ("ko" , KO_PHRASES) , ("en" , EN_PHRASES)))
+        part = f"{rng.choice(ZH_PHRASES)}<{lang}>{rng.choice(pool)}</{lang}>{rng.choice(ENDINGS)}"
+        parts.append(part)
+        size += len(part)
+    return "".join(parts)
+
+def _numbers(rng , min_chars):
+    parts , size = [] , 0
+    while size < min_chars:
+        number = rng.choice((f"{rng.randint(1 , 9999)}" , f"{rng.randint(1 , 999)}.{rng.randint(0 , 99)}" ,
+                             f"{rng.randint(2000 , 2030)}年{rng.randint(1 , 12)}月{rng.randint(1 , 28)}日" ,
+                             f"{rng.randint(1 , 100)}%"))
+        part = f"{rng.choice(ZH_PHRASES + JA_PHRASES)}{number}{rng.choice(ENDINGS)}"
+        parts.append(part)
+        size += len(part)
+    return "".join(parts)
+
+def _quotes(rng , min_chars):
+    parts , size = [] , 0
+    while size < min_chars:
+        left , right = rng.choice((("“" , "”") , ("「" , "」") , ("《" , "》") , ("（" , "）") , ('"' , '"') , ("'" , "'")))
+        part = f"{rng.choice(ZH_PHRASES)}{left}{_sentence(rng).strip()}{right}{rng.choice(ENDINGS)}"
+        parts.append(part)
+        size += len(part)
+    return "".join(parts)
+
+# 语料类型：名称 -> (生成函数 , 最小字数 , 条数)
+# Corpus kinds: name -> (generator , minimum characters , item count)
+CORPORA = {
+    "short":     (_mixed   , 20   , 400),
+    "paragraph": (_mixed   , 400  , 60),
+    "tagged":    (_tagged  , 120  , 120),
+    "numbers":   (_numbers , 120  , 120),
+    "quotes":    (_quotes  , 120  , 120),
+    "document":  (_mixed   , 8000 , 4),
+}
+
+
+def make_corpus(kind , seed=0 , count=None):
+    """
+    功能：生成指定类型的确定性语料。
+    Function: Generate a deterministic corpus of the given kind.\n
+    Args:
+        kind (str): short / paragraph / tagged / numbers / quotes / document
+        seed (int): 随机种子 , random seed
+        count (int): 条数，默认为预设值 , item count, defaults to the preset
+    Returns:
+        list: [str,...]
+    """
+    generator , min_chars , default_count = CORPORA[kind]
+    rng = random.Random(f"{kind}-{seed}")
+    return [generator(rng , min_chars) for _ in range(count or default_count)]
+
+
+def _percentile(values , q):
+    values = sorted(values)
+    if len(values) == 0:return 0.0
+    index = min(len(values) - 1 , max(0 , round(q * (len(values) - 1))))
+    return values[index]
+
+def run(kind , corpus , filters=None , repeat=3):
+    """
+    功能：对一份语料运行基准测试。
+    Function: Benchmark one corpus.\n
+    Returns:
+        dict: {"kind","items","chars","chars_per_sec","p50_ms","p99_ms","peak_kb","model_calls","bypass_ratio"}
+    """
+    chars = sum(len(text) for text in corpus)
+    # 预热模型与正则缓存 , warm up the model and the regex caches
+    warmup = Segmenter(filters)
+    for text in corpus[:20]:warmup.getTexts(text)
+    latencies , elapsed = [] , None
+    for _ in range(max(1 , repeat)):
+        segmenter = Segmenter(filters)
+        start = time.perf_counter()
+        for text in corpus:
+            begin = time.perf_counter()
+            segmenter.getTexts(text)
+            latencies.append(time.perf_counter() - begin)
+        total = time.perf_counter() - start
+        elapsed = total if elapsed is None else min(elapsed , total)
+    stats = segmenter.getModelStats()
+    # 单独一轮测量内存峰值，避免 tracemalloc 影响计时
+    # Peak memory is measured in a separate pass so tracemalloc does not skew the timings
+    segmenter = Segmenter(filters)
+    tracemalloc.start()
+    for text in corpus:segmenter.getTexts(text)
+    _ , peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "kind": kind,
+        "items": len(corpus),
+        "chars": chars,
+        "chars_per_sec": chars / elapsed if elapsed > 0 else 0.0,
+        "p50_ms": _percentile(latencies , 0.50) * 1000,
+        "p99_ms": _percentile(latencies , 0.99) * 1000,
+        "peak_kb": peak / 1024,
+        "model_calls": stats["model_calls"],
+        "bypass_ratio": stats["bypass_ratio"],
+    }
+
+
+def import_time(repeat=5):
+    """
+    功能：在新进程中测量 import LangSegment 的耗时（取最小值），模型延迟加载，不计入其中。
+    Function: Measure `import LangSegment` in fresh processes (best of repeat); the model loads lazily and is not included.\n
+    Returns:
+        dict: {"kind":"import","import_ms"}
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ , PYTHONPATH=os.pathsep.join(filter(None , (root , os.environ.get("PYTHONPATH")))))
+    code = "import time;start=time.perf_counter();import LangSegment;print(time.perf_counter()-start)"
+    best = None
+    for _ in range(max(1 , repeat)):
+        output = subprocess.run([sys.executable , "-c" , code] , env=env , check=True , capture_output=True , text=True).stdout
+        elapsed = float(output.strip().splitlines()[-1])
+        best = elapsed if best is None else min(best , elapsed)
+    return {"kind": "import", "import_ms": best * 1000}
+
+
+def compare(results , baseline , tolerance=0.15):
+    """
+    功能：与基线比较，返回退化项列表（吞吐下降或延迟、模型调用上升超过容差）。
+    Function: Compare with a baseline and return regressions (throughput drop, or latency / model call rise beyond tolerance).
+    """
+    previous = {item["kind"]: item for item in baseline}
+    regressions = []
+    for item in results:
+        old = previous.get(item["kind"])
+        if old is None:continue
+        if "chars_per_sec" in item and item["chars_per_sec"] < old["chars_per_sec"] * (1 - tolerance):
+            regressions.append(f'{item["kind"]}: chars/sec {old["chars_per_sec"]:.0f} -> {item["chars_per_sec"]:.0f}')
+        for key in ("p99_ms" , "model_calls" , "import_ms"):
+            if key not in item or key not in old:continue
+            if item[key] > old[key] * (1 + tolerance) and item[key] - old[key] > 1e-3:
+                regressions.append(f'{item["kind"]}: {key} {old[key]:.3f} -> {item[key]:.3f}')
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m LangSegment.benchmark" , description="LangSegment getTexts benchmark")
+    parser.add_argument("-k" , "--kinds" , default=",".join(CORPORA) , help="comma-separated corpus kinds")
+    parser.add_argument("-f" , "--filters" , default="zh,en,ja,ko" , help="comma-separated language filters")
+    parser.add_argument("-r" , "--repeat" , type=int , default=3 , help="timed passes per corpus, best is kept")
+    parser.add_argument("-s" , "--seed" , type=int , default=0 , help="corpus random seed")
+    parser.add_argument("--save" , help="write the results to a JSON file")
+    parser.add_argument("--compare" , help="compare with a JSON baseline, exit 1 on regression")
+    parser.add_argument("--tolerance" , type=float , default=0.15 , help="allowed relative regression")
+    parser.add_argument("--no-import" , action="store_true" , help="skip the cold import time measurement")
+    options = parser.parse_args(argv)
+
+    filters = [item for item in options.filters.split(",") if item]
+    results = []
+    print(f'{"kind":<10} {"items":>6} {"chars":>8} {"chars/s":>10} {"p50 ms":>8} {"p99 ms":>8} {"peak KB":>9} {"model":>7} {"bypass":>7}')
+    for kind in options.kinds.split(","):
+        item = run(kind , make_corpus(kind , options.seed) , filters , options.repeat)
+        results.append(item)
+        print(f'{kind:<10} {item["items"]:>6} {item["chars"]:>8} {item["chars_per_sec"]:>10.0f} {item["p50_ms"]:>8.3f} '
+              f'{item["p99_ms"]:>8.3f} {item["peak_kb"]:>9.1f} {item["model_calls"]:>7} {item["bypass_ratio"]:>7.1%}')
+    if not options.no_import:
+        item = import_time()
+        results.append(item)
+        print(f'{"import":<10} {item["import_ms"]:>8.1f} ms')
+    if options.save:
+        with open(options.save , "w" , encoding="utf-8") as f:json.dump(results , f , indent=2)
+    if options.compare:
+        with open(options.compare , encoding="utf-8") as f:baseline = json.load(f)
+        regressions = compare(results , baseline , options.tolerance)
+        for line in regressions:print("REGRESSION" , line)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,271 @@
+"""
+分词结果缓存：按 (文本, 过滤器) 缓存分词结果，用于重复出现的常用文本。
+Segmentation result caches keyed by (text, filters), for frequently repeated input.
+
+语种识别的持久化缓存：按 (模型版本, 语种集合, 片段文本) 保存到 sqlite，重新处理语料时不再调用模型。
+Persistent classification cache: (model version, language set, fragment text) stored in sqlite,
+so reprocessing a corpus does not call the model again.
+"""
+
+import atexit
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResultCache():
+    """
+    有界 LRU 缓存，可按条目数和估算字节数限制大小，线程安全。
+    Bounded LRU cache limited by entry count and estimated bytes, thread-safe.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._bytes = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        pass
+
+    @staticmethod
+    def _copy(words, counts):
+        # 返回副本，调用方修改结果不会污染缓存
+        # Hand out copies so callers cannot corrupt cached entries
+        return [data.copy() for data in words] , (list(counts) if counts is not None else None)
+
+    @staticmethod
+    def _sizeof(text, words):
+        size = sys.getsizeof(text)
+        for data in words:size += sys.getsizeof(data["text"]) + 64
+        return size
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+        words , counts , _ = value
+        return self._copy(words, counts)
+
+    def put(self, key, words, counts):
+        words , counts = self._copy(words, counts)
+        size = self._sizeof(key[0], words)
+        if self.max_bytes is not None and size > self.max_bytes:return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:self._bytes -= old[2]
+            self._items[key] = (words, counts, size)
+            self._bytes += size
+            while len(self._items) > self.max_entries or \
+                (self.max_bytes is not None and self._bytes > self.max_bytes):
+                _, (_, _, size) = self._items.popitem(last=False)
+                self._bytes -= size
+        pass
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+        pass
+
+    def stats(self):
+        """
+        功能：缓存统计 , Function: cache statistics\n
+        Returns:
+            dict: {"hits","misses","entries","bytes","max_entries","max_bytes"}
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._items),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+            }
+
+    def __len__(self):
+        return len(self._items)
+
+
+class DiskCache():
+    """
+    持久化的语种识别缓存（sqlite），多进程可共用同一个文件。写入先在内存中攒批，超过 max_entries 时按最近使用时间淘汰。
+    模型版本变化时旧的结果全部作废。
+    Persistent classification cache (sqlite) that several processes can share. Writes are batched in memory,
+    and entries beyond max_entries are evicted by last use. Changing the model version drops every old result.
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)",
+        "CREATE TABLE IF NOT EXISTS langid (key TEXT PRIMARY KEY, lang TEXT, score REAL, used REAL) WITHOUT ROWID",
+        "CREATE INDEX IF NOT EXISTS langid_used ON langid (used)",
+    )
+
+    def __init__(self, path, max_entries=1000000, version="", flush_every=256):
+        """
+        Args:
+            path (str): sqlite 文件路径 , sqlite file path
+            max_entries (int): 最大条目数，淘汰到其 90% , max entries, eviction trims to 90% of it
+            version (str): 模型版本，不同时清空旧结果 , model version, old results are dropped when it differs
+            flush_every (int): 攒批写入的条目数 , entries buffered before a write
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.version = version
+        self.flush_every = max(1 , flush_every)
+        self.hits = 0
+        self.misses = 0
+        self._count = 0
+        self._pending = {}
+        self._touched = set()
+        self._conn = None
+        self._pid = None
+        self._lock = threading.Lock()
+        pass
+
+    def _connect(self):
+        # 每个进程使用自己的连接，fork 继承的连接不能再用
+        # One connection per process, a connection inherited through fork must not be reused
+        pid = os.getpid()
+        if self._conn is not None and self._pid == pid:return self._conn
+        import sqlite3
+        if self._pid is not None and self._pid != pid:
+            self._pending , self._touched = {} , set()
+        conn = sqlite3.connect(self.path , timeout=30 , check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with conn:
+            for statement in self.SCHEMA:conn.execute(statement)
+            row = conn.execute("SELECT value FROM meta WHERE name='version'").fetchone()
+            if row is None or row[0] != self.version:
+                conn.execute("DELETE FROM langid")
+                conn.execute("INSERT OR REPLACE INTO meta VALUES ('version' , ?)" , (self.version ,))
+        self._count = conn.execute("SELECT COUNT(*) FROM langid").fetchone()[0]
+        self._conn , self._pid = conn , pid
+        # 正常退出时写入剩余条目；进程池的工作进程在 close()/join() 后同样执行
+        # Write the rest on a normal exit; pool workers do the same after close()/join()
+        atexit.register(self.flush)
+        if "multiprocessing" in sys.modules:
+            from multiprocessing import util
+            util.Finalize(self , self.flush , exitpriority=10)
+        return conn
+
+    @staticmethod
+    def _key(langs, text):
+        langs = ",".join(sorted(langs)) if langs else "*"
+        return f"{langs}\x1f{text}"
+
+    def get(self, langs, text):
+        """
+        功能：查询一个片段，未命中返回 None。
+        Function: Look up one fragment, None on a miss.\n
+        Returns:
+            tuple: (language , score)
+        """
+        return self.get_many(langs , (text ,)).get(text)
+
+    def get_many(self, langs, texts):
+        """
+        功能：批量查询，返回命中的 {片段: (语种 , 分数)}。
+        Function: Look up many fragments, returning the hits as {fragment: (language , score)}.
+        """
+        keys = {self._key(langs , text):text for text in texts}
+        found = {}
+        with self._lock:
+            conn = self._connect()
+            pending = self._pending
+            missing = []
+            for key , text in keys.items():
+                value = pending.get(key)
+                if value is None:missing.append(key)
+                else:found[text] = value
+            for i in range(0 , len(missing) , 500):
+                chunk = missing[i:i + 500]
+                sql = f"SELECT key , lang , score FROM langid WHERE key IN ({','.join('?' * len(chunk))})"
+                for key , lang , score in conn.execute(sql , chunk):
+                    found[keys[key]] = (lang , score)
+                    self._touched.add(key)
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+            if len(self._touched) >= self.flush_every * 16:self._flush()
+        return found
+
+    def put(self, langs, text, value):
+        self.put_many(langs , ((text , value) ,))
+        pass
+
+    def put_many(self, langs, items):
+        """
+        功能：保存识别结果 [(片段 , (语种 , 分数)),...]，攒够 flush_every 条后写入。
+        Function: Store results [(fragment , (language , score)),...], written once flush_every are buffered.
+        """
+        with self._lock:
+            pending = self._pending
+            for text , (lang , score) in items:
+                pending[self._key(langs , text)] = (lang , float(score))
+            if len(pending) >= self.flush_every:self._flush()
+        pass
+
+    def _flush(self):
+        pending , touched = self._pending , self._touched
+        if len(pending) == 0 and len(touched) == 0:return
+        conn = self._connect()
+        now = time.time()
+        with conn:
+            if len(pending) > 0:
+                cursor = conn.executemany("INSERT OR IGNORE INTO langid VALUES (? , ? , ? , ?)" ,
+                                          ((key , lang , score , now) for key , (lang , score) in pending.items()))
+                self._count += max(0 , cursor.rowcount)
+            if len(touched) > 0:
+                conn.executemany("UPDATE langid SET used=? WHERE key=?" , ((now , key) for key in touched))
+            if self.max_entries and self._count > self.max_entries:
+                # 其他进程也在写入，淘汰前重新计数 , other processes write too, so recount before evicting
+                self._count = conn.execute("SELECT COUNT(*) FROM langid").fetchone()[0]
+                excess = self._count - int(self.max_entries * 0.9)
+                if self._count > self.max_entries and excess > 0:
+                    cursor = conn.execute("DELETE FROM langid WHERE key IN (SELECT key FROM langid ORDER BY used LIMIT ?)" , (excess ,))
+                    self._count -= max(0 , cursor.rowcount)
+        self._pending , self._touched = {} , set()
+        pass
+
+    def flush(self):
+        """
+        功能：立即写入缓冲的条目。
+        Function: Write the buffered entries now.
+        """
+        with self._lock:
+            if self._conn is not None and self._pid != os.getpid():return
+            self._flush()
+        pass
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._flush()
+                self._conn.close()
+            self._conn , self._pid = None , None
+        pass
+
+    def stats(self):
+        """
+        功能：缓存统计 , Function: cache statistics\n
+        Returns:
+            dict: {"hits","misses","entries","pending","max_entries","version"}
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": self._count,
+                "pending": len(self._pending),
+                "max_entries": self.max_entries,
+                "version": self.version,
+            }
@@ -0,0 +1,129 @@
+"""
+汉字片段的中日判定：只含汉字的片段是 zh|ja 歧义的主要来源，通用模型对它们几乎总是判为中文。
+这里按字查表累加对数几率：表由标准库编码表（GB2312 / Big5 / JIS X 0208 / JIS X 0212）在首次使用时生成，
+简体字、繁体字倾向中文，只有日本新字体、国字与 々 倾向日文，中日通用的字不提供证据。
+只有置信度足够时才直接给出结果，否则交回通用模型。
+zh/ja decision for Han-only fragments: they are the main source of the zh|ja ambiguity, and the general
+model labels them Chinese almost every time. Here per-character log-odds are summed from a table built on
+first use from the standard library codec tables (GB2312 / Big5 / JIS X 0208 / JIS X 0212): simplified
+and traditional characters lean Chinese, only Japanese shinjitai, kokuji and 々 lean Japanese, and
+characters shared by both languages carry no evidence. A result is only returned when it is confident enough,
+otherwise the general model decides.
+"""
+
+import math
+import threading
+
+# 查表范围，与 HAN_RANGES 相同 , table range, same as HAN_RANGES
+HAN_START = 0x4E00
+HAN_END   = 0xA000
+
+# 对数几率，正数倾向日文，负数倾向中文 , log-odds, positive leans Japanese, negative leans Chinese
+WEIGHTS = {
+    "simplified": -4.0,   # 在 GB2312 中但不在 JIS X 0208 中 , in GB2312 but not in JIS X 0208
+    "shinjitai": 4.0,     # 在 JIS X 0208 中，不在 GB2312 与 Big5 中 , in JIS X 0208, neither in GB2312 nor Big5
+    # JIS 第一水准与 Big5 共有、不在 GB2312 中：繁体中文几乎全由这类字组成，不提供证据；只有新字体、国字与 々 倾向日文
+    # JIS level 1 and Big5, not in GB2312: Traditional Chinese is made almost entirely of these, so they carry no
+    # evidence; only shinjitai, kokuji and 々 lean Japanese
+    "common": 0.0,
+    "kyujitai": -1.0,     # JIS 第二水准与 Big5 共有，不在 GB2312 中 , JIS level 2 and Big5, not in GB2312
+    "traditional": -2.0,  # 只在 Big5 中 , Big5 only
+}
+# 模型中其他使用汉字的语种，候选语种包含它们（或不受限制）时不使用此表
+# Other Han-script languages of the model; the table is not used when the candidates include them (or are unrestricted)
+OTHER_LANGUAGES = frozenset(("yue" , "wuu"))
+# 々 只用于日文 , 々 is only used in Japanese
+ITERATION_MARK = "々"
+
+# 低于该置信度时交回通用模型，0.95 约等于对数几率 3
+# Below this confidence the general model decides, 0.95 is about a log-odds of 3
+MIN_CONFIDENCE = 0.95
+
+_table = None
+_lock = threading.Lock()
+
+
+def _levels(encoding):
+    # 每个汉字在编码表中的级别：0 为不在表中 , level of every Han character in the codec table, 0 when absent
+    import numpy as np
+    levels = np.zeros(HAN_END - HAN_START , dtype=np.int8)
+    for index in range(HAN_END - HAN_START):
+        try:
+            code = chr(HAN_START + index).encode(encoding)
+        except UnicodeEncodeError:
+            continue
+        if encoding == "gb2312":
+            # 第一级汉字为 0xB0-0xD7 区 , level 1 hanzi are rows 0xB0-0xD7
+            levels[index] = 1 if code[0] <= 0xD7 else 2
+        elif encoding == "big5":
+            # 常用字为 0xA440-0xC67E , frequent characters are 0xA440-0xC67E
+            levels[index] = 1 if (code[0] << 8 | code[1]) <= 0xC67E else 2
+        else:
+            # EUC-JP：0x8F 前缀为 JIS X 0212，第一水准为 0xB0-0xCF 区
+            # EUC-JP: the 0x8F prefix is JIS X 0212, level 1 kanji are rows 0xB0-0xCF
+            levels[index] = 3 if code[0] == 0x8F else (1 if code[0] <= 0xCF else 2)
+    return levels
+
+def build_table():
+    """
+    功能：由编码表生成逐字的对数几率表（numpy float32 数组，下标为码位减去 HAN_START）。
+    Function: Build the per-character log-odds table from the codec tables (a numpy float32 array
+    indexed by code point minus HAN_START).
+    """
+    import numpy as np
+    gb , big5 , jis = _levels("gb2312") , _levels("big5") , _levels("euc_jp")
+    in_jis = (jis == 1) | (jis == 2)
+    table = np.zeros(HAN_END - HAN_START , dtype=np.float32)
+    table[(gb > 0) & ~in_jis] = WEIGHTS["simplified"]
+    table[in_jis & (gb == 0) & (big5 == 0)] = WEIGHTS["shinjitai"]
+    table[(jis == 1) & (gb == 0) & (big5 > 0)] = WEIGHTS["common"]
+    table[(jis == 2) & (gb == 0) & (big5 > 0)] = WEIGHTS["kyujitai"]
+    table[~in_jis & (gb == 0) & (big5 > 0)] = WEIGHTS["traditional"]
+    return table
+
+def _get_table():
+    global _table
+    if _table is None:
+        with _lock:
+            # 逐项访问时 memoryview 比 ndarray 快得多 , item access on a memoryview is much faster than on an ndarray
+            if _table is None:_table = memoryview(build_table())
+    return _table
+
+def score(text):
+    """
+    功能：片段的对数几率之和，正数倾向日文；含有表外字符时返回 None。
+    Function: Summed log-odds of a fragment, positive leans Japanese; None when it has characters outside the table.
+    """
+    table = _get_table()
+    total = 0.0
+    for char in text:
+        index = ord(char) - HAN_START
+        if 0 <= index < HAN_END - HAN_START:
+            total += table[index]
+        elif char == ITERATION_MARK:
+            total += WEIGHTS["shinjitai"]
+        else:
+            return None
+    return total
+
+def classify(text):
+    """
+    功能：判定只含汉字的片段，返回 (语种 , 置信度)；含有表外字符时返回 (None , 0.0)。
+    Function: Classify a Han-only fragment, returning (lang , confidence); (None , 0.0) when it has
+    characters outside the table.\n
+    Returns:
+        tuple: ("ja", 0.98) , ("zh", 0.5)
+    """
+    value = score(text)
+    if value is None or len(text) == 0:return None , 0.0
+    return ("ja" if value > 0 else "zh") , 1.0 / (1.0 + math.exp(-abs(value)))
+
+def decide(text, langs=None):
+    """
+    功能：置信时返回语种，否则返回 None 交给通用模型。langs 为模型的候选语种，None 表示不受限制。
+    Function: Return the language when confident, otherwise None so the general model decides.
+    langs are the model's candidate languages, None meaning unrestricted.
+    """
+    if langs is None or not langs.isdisjoint(OTHER_LANGUAGES):return None
+    language , confidence = classify(text)
+    return language if confidence >= MIN_CONFIDENCE else None
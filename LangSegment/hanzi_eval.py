@@ -0,0 +1,127 @@
+"""
+汉字片段评测：只含汉字的日文、简体中文、繁体中文词语与句子，比较通用模型单独判定与"汉字表 + 模型"的准确率，
+以及汉字表直接给出结果（不调用模型）的条数与其中的错误数。
+Han-only evaluation: kanji-only Japanese, Simplified Chinese and Traditional Chinese words and sentences,
+comparing the accuracy of the general model alone with the character table plus the model, and counting
+how many fragments the table decides on its own (skipping the model) and how many of those are wrong.
+也比较汉字表判定与模型识别每个片段的耗时（微秒），以及汉字表无法判定、回退到模型的比例。
+It also times the table decision against the model's classify per fragment (microseconds) and reports the
+fallback rate, the share of fragments the table leaves to the model.
+
+    python -m LangSegment.hanzi_eval
+"""
+
+import argparse
+import sys
+from time import perf_counter
+
+from . import hanzi
+from .model import model
+
+
+JA = """
+東京都 大阪府 新幹線 自動販売機 経済産業省 株式会社 図書館 駅前広場 天気予報 入場券 案内所 営業中 売切 禁煙席 電車 乗換案内 番号 国際空港 郵便局 警察署 交差点 神社 寺院 温泉旅館 会議室 出口 入口
+検索 設定 保存 削除 確認 変更 登録 読込 書込 選択 表示 編集 終了 開始 関連記事 総理大臣 内閣総理大臣 衆議院 参議院 自民党 東京大学 早稲田大学 京都 北海道 沖縄県 横浜市 名古屋 福岡 広島 仙台
+神戸 富士山 桜 寿司 刺身 焼肉 弁当 味噌汁 醤油 漢字 平仮名 片仮名 日本語 英語 中国語 韓国語 会社員 社長 部長 課長 担当者 本日 毎日 今週 来週 先月 今年 去年 年末年始 三連休 誕生日 結婚式
+卒業式 入学式 運動会 花火大会 夏祭 初詣 大掃除 気温 湿度 台風 地震 津波 避難所 緊急地震速報 発売日 価格 税込 送料無料 在庫 注文 配達 返品 領収書 請求書 見積書 契約書 履歴書 職務経歴書 面接
+採用 退職 転職 残業 有給休暇 働 込 畑 峠 辻 枠 栃木県 茨城県 埼玉県 千葉県 神奈川県 静岡県 愛知県 岐阜県 滋賀県 奈良県 和歌山県 鹿児島県 佐々木 鈴木 高橋 田中 渡辺 伊藤 山本 中村 小林 加藤
+吉田 山田 佐藤 松本 井上 木村 林 清水 山崎 森 池田 橋本 阿部 石川 山下 中島 前田 藤田 後藤 岡田 長谷川 村上 近藤 石井 坂本 遠藤 青木 藤井 西村 福田 太田 三浦 藤原 岡本 松田 中川 中野
+原田 小野 竹内 金子 和田 中山 石田 上田 森田 原 柴田 酒井 工藤 横山 宮崎 宮本 内田 高木 安藤 島田 谷口 大野 高田 丸山 今井 河野 藤本 村田 武田 上野 杉山 増田 小山 大塚 平野 菅原 久保
+松井 千葉 岩崎 桜井 野口 松尾 野村 木下 菊地 佐野 大西 杉本 新井 浜田 菅野 市川 水野 小松 島崎 高野 山内 西田 菊池 西川 五十嵐 北村 安田 中田 川口 平田 川崎 飯田 吉川 本田 久保田 沢田
+辻 関 吉村 渡部 岩田 中西 服部 樋口 福島 川上 永井 松岡 田口 山中 森本 土屋 矢野 広瀬 秋山 石原 松下 大橋 松浦 吉岡 小池 馬場 浅野 荒木 大久保 野田 小沢 田村 熊谷 日本国憲法 第一章 天皇
+国民 主権 基本的人権 平和主義 国会 内閣 司法 財政 地方自治 改正 最高法規 補則 労働基準法 民法 刑法 商法 会社法 著作権法 個人情報保護法 消費税 所得税 住民税 固定資産税 国民健康保険 厚生年金
+雇用保険 介護保険 生活保護 児童手当 出産育児一時金 高額療養費 傷病手当金 失業給付 確定申告 年末調整 源泉徴収票 給与明細 賞与 退職金 企業年金 株価 円高 円安 為替相場 日経平均 東証 上場企業 決算発表
+業績予想 営業利益 経常利益 純利益 売上高 前年同期比 増収増益 減収減益 過去最高 赤字転落 黒字化 経営再建 事業譲渡 合併 買収 提携 新製品 記者会見 社長交代 人事異動 新卒採用 中途採用 働方改革 在宅勤務
+副業 兼業 育児休業 介護休業 時短勤務 残業規制 同一労働同一賃金 最低賃金 春闘 賃上 物価高 電気料金 値上 値下 特売 半額 無料体験 期間限定 数量限定 新発売 大好評 売上第一位 人気商品 話題沸騰 品切
+再入荷 予約受付中 受付終了 営業時間 定休日 臨時休業 駐車場 無料駐車場 徒歩五分 最寄駅 各駅停車 快速 急行 特急 始発 終電 乗車券 特急券 指定席 自由席 改札口 乗場 運賃 払戻 遅延証明書 運転見合
+振替輸送
+""".split()
+
+ZH_HANS = """
+我喜欢在雨天里听音乐 语种分词是语音合成必不可少的环节 此次发布会带来了新的系列机型 这次的屏幕采用了新的技术 欢迎来玩 我们明天去海边度假 请把文件发给我 这个价格非常合理 他说的话很有道理 天气预报说明天会下雪 北京
+上海 广州 深圳 中华人民共和国 国务院 人工智能 机器学习 数据分析 电子商务 微信支付 支付宝 高铁 地铁站 火车票 飞机场 出租车 医院 银行 学校 老师 学生 朋友 家人 工作 公司 会议 经理 客户 产品 服务
+问题 办法 时间 地方 东西 事情 为什么 怎么办 没关系 谢谢 不客气 对不起 你好 再见 早上好 晚安 生日快乐 新年快乐 恭喜发财 欢迎光临 请稍等 马上到 一路平安 吃饭了吗 好久不见 加油 太好了 真的吗 当然
+可能 应该 需要 必须 已经 正在 刚才 以后 以前 现在 今天 明天 昨天 周末 春节 中秋节 国庆节 端午节 饺子 月饼 汤圆 火锅 烤鸭 小笼包 豆腐 米饭 面条 咖啡 啤酒 长城 故宫 天安门 西湖 黄山 长江
+黄河 上海浦东国际机场 习近平 李强 中共中央 全国人大 政协 人民日报 新华社 央视新闻 外交部发言人 国家统计局 国内生产总值 同比增长 居民消费价格 房地产市场 股市 人民币汇率 央行 降准 降息 贷款利率 社保
+医保 养老金 公积金 个税 减税降费 营商环境 高质量发展 乡村振兴 共同富裕 一带一路 粤港澳大湾区 长三角 京津冀 新能源汽车 光伏 芯片 半导体 华为 小米 阿里巴巴 腾讯 百度 京东 拼多多 字节跳动 抖音 快手
+微博 知乎 哔哩哔哩 淘宝 天猫 双十一 快递 外卖 网购 直播带货 短视频 手机 电脑 平板 耳机 充电器 数据线 蓝牙 无线网络 密码 账号 登录 注册 验证码 下载 安装 更新 设置 删除 保存 分享 评论 点赞
+收藏 关注 粉丝 我爱你 他们 她们 你们 我们 咱们 这里 那里 哪里 什么 怎么 多少 几个 一些 所有 每个 别的 其他 自己 大家 别人 这么 那么 非常 特别 比较 稍微 有点 一点 很多 不少 还是 或者
+但是 因为 所以 如果 虽然 而且 然后 于是 只要 只有 除了 关于 对于 根据 通过 按照 为了 由于 即使 无论 不管 尽管 既然 一边 一方面 另外 总之 例如 比如 首先 其次 最后 总的来说 说实话 其实
+原来 终于 突然 马上 立刻 渐渐 逐渐 一直 从来 总是 常常 经常 往往 偶尔 曾经 将要 快要 就要 刚刚
+""".split()
+
+ZH_HANT = """
+這個問題 我們 臺灣 資訊 軟體 電腦 網路 學校 醫院 銀行 謝謝 對不起 沒關係 為什麼 怎麼辦 時間 東西 事情 歡迎光臨 新年快樂 臺北市 高雄 國立臺灣大學 總統府 立法院 行政院 捷運站 便利商店 珍珠奶茶
+夜市 颱風假 這裡 那裡 哪裡 甚麼 他們 妳們 說話 聽音樂 讀書 寫字 開車 買東西 賣東西 飛機場 計程車 電視 電話 手機號碼 輸入 設定 儲存 刪除 請問這個問題開會討論 請問你叫什麼名字 我們明天一起去看電影
+這個價格非常合理 他說的話很有道理 天氣預報說明天會下雨 請把文件寄給我 歡迎來到臺灣 這次發表會帶來了新的系列機型 我喜歡在雨天裡聽音樂 語言分詞是語音合成必不可少的環節 這間餐廳的菜很好吃 你今天學習日文了嗎
+我們公司正在招聘新員工 政府宣布了新的經濟政策 颱風即將登陸請民眾注意安全 總統今天出席了國慶典禮 這本書的內容非常豐富 學生們在圖書館裡認真讀書 醫生建議他多休息 銀行今天下午三點關門 請問洗手間在哪裡
+我已經把報告寫完了 他們正在討論明年的計畫 這個週末你有空嗎 感謝大家的支持與鼓勵 交通部宣布高鐵票價調整 立法院通過了預算案 股市今天大幅上漲 消費者物價指數持續上升 這部電影獲得了很多獎項 我們應該保護環境
+網路購物越來越方便 手機電池很快就沒電了 請輸入您的帳號和密碼 系統正在更新請稍候 會議延期到下週舉行 老師請同學們安靜 這條路晚上很危險 他從小就喜歡畫畫 媽媽在廚房裡做飯 孩子們在公園裡玩耍 我覺得這個主意不錯
+這家店的服務態度很好 請問附近有便利商店嗎 火車站離這裡很遠嗎 我們搭計程車去機場吧 今天晚上要加班 謝謝你的幫忙 對不起讓你久等了 沒關係下次再說 祝你生日快樂 恭喜發財紅包拿來 中華民國 臺灣大學 國立故宮博物院
+行政院長 衛生福利部 教育部 經濟部 內政部 國防部 外交部 財政部 法務部 勞動部 環境部 數位發展部 文化部 農業部 國家發展委員會 中央銀行 臺北捷運 桃園國際機場 高雄港 臺中市政府 新北市 阿里山 日月潭
+太魯閣 墾丁 九份老街 士林夜市 鼎泰豐 牛肉麵 滷肉飯 蚵仔煎 臭豆腐 鳳梨酥 烏龍茶 電動機車 半導體產業 護國神山 晶圓代工 人工智慧 資訊安全 雲端運算 電子郵件 應用程式 作業系統 資料庫 軟體工程師 網際網路
+數據分析
+""".split()
+
+SETS = (("ja" , JA , "ja") , ("zh-Hans" , ZH_HANS , "zh") , ("zh-Hant" , ZH_HANT , "zh"))
+
+
+def _timing(function , texts , langs , repeat):
+    # 多次运行取最快一次，返回每个片段的微秒数 , best of several runs, in microseconds per fragment
+    best = None
+    for _ in range(repeat):
+        start = perf_counter()
+        for text in texts:function(text , langs)
+        elapsed = perf_counter() - start
+        best = elapsed if best is None else min(best , elapsed)
+    return best / len(texts) * 1e6
+
+
+def evaluate(langs=("zh" , "en" , "ja" , "ko") , repeat=5):
+    """
+    功能：对每个评测集统计准确率与耗时。
+    Function: Accuracy and timing on every evaluation set.\n
+    Args:
+        repeat (int): 计时运行次数，取最快一次 , timing runs, the fastest is kept
+    Returns:
+        list: [{"set","items","model","table_model","table_decided","table_wrong","fallback","table_us","model_us"},...]
+    """
+    langs = frozenset(langs)
+    model.warmup(langs)
+    # 计时直接调用模型识别器，不经过持久化缓存 , timing calls the model's identifier directly, bypassing the persistent cache
+    identifier = model.restricted(langs)
+    results = []
+    for name , texts , gold in SETS:
+        item = {"set": name, "items": len(texts), "model": 0, "table_model": 0, "table_decided": 0, "table_wrong": 0}
+        for text in texts:
+            language = model.classify(text , langs)[0]
+            decided = hanzi.decide(text , langs)
+            item["model"] += language == gold
+            item["table_model"] += (decided or language) == gold
+            if decided is not None:
+                item["table_decided"] += 1
+                item["table_wrong"] += decided != gold
+        item["fallback"] = 1 - item["table_decided"] / len(texts)
+        item["table_us"] = _timing(hanzi.decide , texts , langs , repeat)
+        item["model_us"] = _timing(lambda text , langs:identifier.classify(text) , texts , langs , repeat)
+        results.append(item)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m LangSegment.hanzi_eval" , description="zh/ja accuracy on Han-only fragments")
+    parser.add_argument("-f" , "--filters" , default="zh,en,ja,ko" , help="comma-separated candidate languages")
+    parser.add_argument("-r" , "--repeat" , type=int , default=5 , help="timing runs, the fastest is kept")
+    options = parser.parse_args(argv)
+    print(f'{"set":<8} {"items":>6} {"model":>8} {"table+model":>12} {"decided":>8} {"wrong":>6} '
+          f'{"fallback":>9} {"table us":>9} {"model us":>9}')
+    for item in evaluate([lang for lang in options.filters.split(",") if lang] , max(1 , options.repeat)):
+        items = item["items"]
+        print(f'{item["set"]:<8} {items:>6} {item["model"] / items:>8.1%} {item["table_model"] / items:>12.1%} '
+              f'{item["table_decided"]:>8} {item["table_wrong"]:>6} {item["fallback"]:>9.1%} '
+              f'{item["table_us"]:>9.2f} {item["model_us"]:>9.2f}')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+"""
+增量分词：保留每个文档上一次的分词结果，文本修改后只重新处理改动的段落，以及语种上下文
+（前一个语种、zh|ja 等待列表）因此发生变化的后续段落，其余段落直接复用，编辑延迟取决于改动大小而不是文档长度。
+Incremental segmentation: keeps the previous result of a document and, after an edit, only re-segments
+the paragraphs that changed plus the following ones whose language context (previous language, zh|ja
+wait list) changed with them. Every other paragraph is reused as is, so edit latency follows the size of
+the edit rather than the size of the document.
+
+    document = IncrementalSegmenter(filters=["zh", "ja", "en"])
+    document.update(text)            # 首次全部分词 , the first call segments everything
+    document.update(edited_text)     # 之后只处理改动 , later calls only redo what changed
+"""
+
+import re
+
+from .LangSegment import Segmenter, _Context, _as_filters, _segmenter, model
+from .segment import Segment
+from .stream import _OPENERS, _CLOSERS
+
+
+# 段落边界：标点之后的换行。空白不切分片段，只在标点（片段边界）之后切分，结果才与整篇分词一致
+# Paragraph boundary: a line break after punctuation. Whitespace does not split fragments, so only cutting
+# after punctuation (a fragment boundary) keeps the result in line with segmenting the whole text
+_PARAGRAPH_END = re.compile(r'(?<=[^\w\s])[^\S\n]*\n\s*')
+# 影响切分的标记：语言标签、双引号与括号 , marks that block a cut: language tags, double quotes and brackets
+_MARKS = re.compile(r'<\/*[a-zA-Z|-]*>|["' + re.escape(_OPENERS + _CLOSERS) + r']')
+
+
+def _paragraphs(document):
+    """
+    功能：在段落边界切分文档，语言标签、双引号或括号未闭合时不切分（与 StreamSegmenter 的规则相同）。
+    Function: Split the document at paragraph boundaries, except inside an open language tag, double quote
+    or bracket (the StreamSegmenter rule).
+    """
+    pieces = []
+    marks = [(matche.start() , matche.group()) for matche in _MARKS.finditer(document)]
+    start = index = 0
+    tags = quotes = opens = closes = 0
+    for matche in _PARAGRAPH_END.finditer(document):
+        end = matche.end()
+        if end >= len(document):break
+        # 只统计上一个候选位置之后的标记，每次切分后重新计数 , count the marks since the last candidate, reset after every cut
+        while index < len(marks) and marks[index][0] < end:
+            mark = marks[index][1]
+            if mark == '"':quotes += 1
+            elif mark in _OPENERS:opens += 1
+            elif mark in _CLOSERS:closes += 1
+            else:tags += 1
+            index += 1
+        if tags % 2 != 0 or quotes % 2 != 0 or opens > closes:continue
+        pieces.append(document[start:end])
+        start = end
+        tags = quotes = opens = closes = 0
+    pieces.append(document[start:])
+    return pieces
+
+
+class _Piece():
+    __slots__ = ("head", "words", "exit", "counts")
+
+    def __init__(self, head, words, exit, counts):
+        # head 为续接前一个结果的文本，words 为 (语种 , 文本) 元组，复用时不会被修改
+        # head is the text continuing the previous segment, words are (lang , text) tuples that reuse never modifies
+        self.head = head
+        self.words = words
+        self.exit = exit
+        self.counts = counts
+        pass
+
+
+class IncrementalSegmenter():
+    """
+    增量分词器：每个文档一个实例，update() 输入文档的最新全文，返回与 getTexts 相同格式的结果。
+    Incremental segmenter: one instance per document, update() takes the latest full text and returns
+    results in the getTexts format.
+
+    段落的结果以 (段落文本 , 进入时的语种上下文) 为键保存，两者都未改变的段落直接复用，
+    因此结果与从头调用 update() 完全一致。段落之间延续语种上下文的方式与 StreamSegmenter 相同。
+    Paragraph results are keyed by (paragraph text , language context on entry); a paragraph with both
+    unchanged is reused, so the result is always identical to a fresh update(). The context is carried
+    across paragraphs the same way StreamSegmenter carries it across chunks.
+
+    与 StreamSegmenter 一样，段落开头的片段不参考前一段的上下文，语种划分可能与对全文调用 getTexts 不同
+    （如中文段落之后的「東京」は日本，getTexts 将「東京」归为 zh）。
+    As with StreamSegmenter, fragments at the start of a paragraph do not see the previous paragraph's
+    context, so the language split can differ from getTexts on the whole text (e.g. 「東京」は日本 after a
+    Chinese paragraph, where getTexts keeps 「東京」 as zh).
+    """
+
+    def __init__(self, segmenter=None, filters=None):
+        """
+        Args:
+            segmenter (Segmenter): 使用的分词器，默认为模块默认实例 , segmenter to use, defaults to the module one
+            filters (list): 过滤器，默认使用分词器的过滤器 , filters, defaults to the segmenter's
+        """
+        self.segmenter = segmenter if segmenter is not None else _segmenter
+        self.filters = _as_filters(filters)
+        self.reset()
+        pass
+
+    def reset(self):
+        self._pieces = {}
+        self._filters = None
+        self._counts = None
+        # 最近一次 update 的复用统计 , reuse statistics of the last update
+        self.reused = 0
+        self.parsed = 0
+        pass
+
+    def _prepare(self, filters, texts):
+        # 新段落较多时（例如首次调用）先收集所有需要模型的片段一次打分，同 _batch_items
+        # With many new paragraphs (e.g. the first call) score every fragment that needs the model at once, as _batch_items does
+        segmenter = self.segmenter
+        prepared , collected = {} , {}
+        ctx = None
+        for text in texts:
+            if text in prepared:continue
+            ctx = _Context(filters)
+            symbols , _ = segmenter._symbols(ctx , text , False)
+            ctx.fragments = {}
+            segmenter._collect(ctx , symbols , collected)
+            prepared[text] = (symbols , ctx.text_cache , ctx.fragments)
+        texts = list(collected)
+        results = model.classify_batch(texts , ctx.langs) if len(texts) > 0 else []
+        prefetch = {cleans_text:language for cleans_text , (language , _) in zip(texts , results)}
+        return prepared , prefetch
+
+    def _parse(self, ctx, text, entry, prepared=None):
+        carry , waits , lang_last , eos , whole = entry
+        # 前一个结果只需要语种：合并时先追加到空的续接结果，拼装时再接到前一个结果上
+        # Only the language of the previous segment matters: merged text goes into an empty continuation
+        # that is joined onto the previous segment when the results are assembled
+        words = [Segment(carry)] if carry is not None else []
+        ctx.text_waits = [Segment(lang , text) for lang , text in waits]
+        ctx.lang_last = lang_last
+        ctx.lang_count = None
+        segmenter = self.segmenter
+        if prepared is None:
+            words = segmenter._parse(ctx , text , words , eos , whole)
+        else:
+            symbols , ctx.text_cache , ctx.fragments = prepared
+            words = segmenter._process_tags(ctx , words , symbols , True , eos)
+            segmenter._add_model_stats(ctx)
+        head = words.pop(0).text if carry is not None else ""
+        carry = words[-1].lang if len(words) > 0 else carry
+        waits = tuple((data.lang , data.text) for data in ctx.text_waits)
+        words = tuple((data.lang , data.text) for data in words)
+        return _Piece(head , words , (carry , waits , ctx.lang_last) , ctx.lang_count or {})
+
+    def update(self, document:str):
+        """
+        功能：输入文档的最新全文，只重新分词改动的段落。
+        Function: Take the latest full text of the document and only re-segment what changed.\n
+        Returns:
+            list: [{'lang':'zh','text':'?'},...]
+        """
+        if document is None or len(document.strip()) == 0:
+            self.reset()
+            return []
+        filters = self.filters if self.filters is not None else self.segmenter.Langfilters
+        ctx = _Context(filters)
+        texts = _paragraphs(document)
+        last = len(texts) - 1
+        # 过滤器或用户词典更改后不能复用 , nothing can be reused once the filters or the user lexicon change
+        lexicon = self.segmenter.getlexicon()
+        settings = (tuple(filters) , lexicon , lexicon.version if lexicon is not None else None)
+        previous = self._pieces if self._filters == settings else {}
+        pieces = {}
+        seen = set(text for text , _ in previous)
+        fresh = [text for text in texts if text not in seen]
+        prepared , prefetch = self._prepare(filters , fresh) if len(fresh) > 1 else ({} , None)
+        state = (None , () , None)
+        words = []
+        # 最后一个结果的文本片段，最后才拼接 , text pieces of the last result, joined once at the end
+        parts = None
+        counts = {}
+        self.reused = self.parsed = 0
+        for index , text in enumerate(texts):
+            # eos/whole 与 StreamSegmenter 相同 , eos/whole as in StreamSegmenter
+            entry = state + (index == last , last == 0)
+            key = (text , entry)
+            piece = previous.get(key)
+            if piece is None:
+                ctx.prefetch = prefetch
+                piece = self._parse(ctx , text , entry , prepared.get(text))
+                self.parsed += 1
+            else:
+                self.reused += 1
+            pieces[key] = piece
+            state = piece.exit
+            # 续接部分接到前一个结果上 , join the continuation onto the previous segment
+            if piece.head:parts.append(piece.head)
+            for lang , text in piece.words:
+                if parts is not None and len(parts) > 1:words[-1]["text"] = "".join(parts)
+                words.append({"lang": lang, "text": text})
+                parts = [text]
+            for lang , count in piece.counts.items():counts[lang] = counts.get(lang , 0) + count
+        if parts is not None and len(parts) > 1:words[-1]["text"] = "".join(parts)
+        self._pieces = pieces
+        self._filters = settings
+        self._counts = counts
+        return words
+
+    def getCounts(self):
+        """
+        功能：最近一次 update 的语种统计，同 getCounts。
+        Function: Language statistics of the last update, same format as getCounts.
+        """
+        lang_count = Segmenter._sort_counts(self._counts)
+        return lang_count if lang_count is not None else [("zh",0)]
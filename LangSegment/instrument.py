@@ -0,0 +1,107 @@
+"""
+分词埋点：记录每次调用各阶段耗时、片段数、模型调用与缓存命中，供导出到监控系统。
+Instrumentation: per-call stage timings, fragment counts, model invocations and cache hits,
+for export to a metrics system.
+"""
+
+import threading
+
+
+class SegmentStats():
+    """
+    单次分词的统计。时间单位为秒。
+    Statistics of one segmentation call. Times are in seconds.
+
+    symbols  : 占位符替换（符号规则）耗时 , placeholder passes of the symbol rules
+    language : 片段切分与上下文规则耗时（不含模型与合并）, fragment splitting and context rules (excluding model and merging)
+    classify : 模型调用耗时 , model invocations
+    addwords : 结果合并耗时 , merging into the result list
+    total    : 总耗时 , whole call
+    """
+    __slots__ = ("chars", "total", "symbols", "parse", "classify", "addwords",
+                 "fragments", "model_calls", "script_hits", "context_hits", "cache_hit")
+
+    def __init__(self, chars=0):
+        self.chars = chars
+        self.total = 0.0
+        self.symbols = 0.0
+        self.parse = 0.0
+        self.classify = 0.0
+        self.addwords = 0.0
+        self.fragments = 0
+        self.model_calls = 0
+        self.script_hits = 0
+        self.context_hits = 0
+        self.cache_hit = False
+        pass
+
+    @property
+    def language(self):
+        return max(0.0 , self.parse - self.classify - self.addwords)
+
+    def todict(self):
+        return {
+            "chars": self.chars,
+            "total": self.total,
+            "symbols": self.symbols,
+            "language": self.language,
+            "classify": self.classify,
+            "addwords": self.addwords,
+            "fragments": self.fragments,
+            "model_calls": self.model_calls,
+            "script_hits": self.script_hits,
+            "context_hits": self.context_hits,
+            "cache_hit": self.cache_hit,
+        }
+
+    def __repr__(self):
+        return f"SegmentStats({self.todict()})"
+
+
+class StatsCollector():
+    """
+    可直接作为回调使用的累加器，线程安全，便于定期导出。
+    Accumulator usable directly as the stats callback, thread-safe, for periodic export.
+
+        collector = StatsCollector()
+        LangSegment.sethook(collector)
+        ...
+        metrics.export(collector.snapshot(reset=True))
+    """
+
+    _SUMS = ("chars", "total", "symbols", "language", "classify", "addwords",
+             "fragments", "model_calls", "script_hits", "context_hits")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+        pass
+
+    def _reset(self):
+        self.calls = 0
+        self.cache_hits = 0
+        self.max_total = 0.0
+        self.sums = dict.fromkeys(self._SUMS , 0)
+        pass
+
+    def __call__(self, stats):
+        values = stats.todict()
+        with self._lock:
+            self.calls += 1
+            if stats.cache_hit:self.cache_hits += 1
+            if stats.total > self.max_total:self.max_total = stats.total
+            sums = self.sums
+            for key in self._SUMS:sums[key] += values[key]
+        pass
+
+    def snapshot(self, reset=False):
+        """
+        功能：返回累计值，可选清零。
+        Function: Return the accumulated values, optionally resetting them.\n
+        Returns:
+            dict: {"calls","cache_hits","max_total", <summed SegmentStats fields>}
+        """
+        with self._lock:
+            values = dict(self.sums , calls=self.calls , cache_hits=self.cache_hits , max_total=self.max_total)
+            if reset:self._reset()
+        return values
@@ -0,0 +1,216 @@
+"""
+用户词典：把品牌名、产品名、人名等词条直接指定语种（可附带读音文本），不再每次调用都重新识别，
+也不必在文本中加 <ja>…</ja> 标签。词典编译为 Aho-Corasick 自动机，一遍线性扫描找出所有词条，
+匹配到的词条跳过语种识别。
+User lexicon: maps brand names, product names, person names and the like straight to a language (with an
+optional pronunciation text), so they are no longer re-classified on every call and need no inline
+<ja>…</ja> tags. The lexicon compiles into an Aho-Corasick automaton that finds every term in one linear
+pass, and matched terms skip classification entirely.
+
+    lexicon = Lexicon({"iPhone": "en", "佐々木": ("ja", "ささき")})
+    lexicon.load("names.tsv")        # 每行：词条<TAB>语种[<TAB>读音] , one `term<TAB>lang[<TAB>pronunciation]` per line
+    LangSegment.setlexicon(lexicon)
+"""
+
+import re
+import threading
+import uuid
+
+
+def _is_word(char):
+    # 英文与数字词条需要完整单词匹配，"Apple" 不匹配 "Pineapple" , ASCII terms match whole words only, "Apple" does not match "Pineapple"
+    return char.isascii() and char.isalnum()
+
+
+class Lexicon():
+    """
+    用户词典，词条区分大小写。匹配规则：最左最长、互不重叠，英文与数字开头或结尾的词条需要单词边界。
+    User lexicon, terms are case sensitive. Matching is leftmost-longest and non-overlapping; terms that
+    start or end with an ASCII letter or digit need a word boundary there.
+    """
+
+    def __init__(self, entries=None):
+        """
+        Args:
+            entries (dict|iterable): {词条: 语种} 或 {词条: (语种 , 读音)}，或 (词条 , 语种[, 读音]) 序列
+                {term: lang} or {term: (lang , pronunciation)}, or (term , lang[, pronunciation]) items
+        """
+        # 词条 -> (语种 , 输出文本) , term -> (lang , output text)
+        self._entries = {}
+        self._automaton = None
+        self._lock = threading.Lock()
+        # 每次修改加一，供增量分词判断能否复用 , bumped on every change, lets incremental segmentation tell whether it can reuse
+        self.version = 0
+        # 跨进程不变的标识，进程池据此缓存词典 , identity kept across processes, lets process pools cache the lexicon
+        self.uid = uuid.uuid4().hex
+        if entries is not None:self.update(entries)
+        pass
+
+    def __getstate__(self):
+        # 进程池传参时只传词条，锁不能序列化，自动机在子进程中重新编译
+        # Only the terms cross process boundaries: the lock cannot be pickled and the automaton recompiles in the child
+        return {"entries": self._entries , "version": self.version , "uid": self.uid}
+
+    def __setstate__(self, state):
+        self._entries = state["entries"]
+        self._automaton = None
+        self._lock = threading.Lock()
+        self.version = state["version"]
+        self.uid = state.get("uid") or uuid.uuid4().hex
+        pass
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, term):
+        return term in self._entries
+
+    def get(self, term, default=None):
+        """
+        功能：词条的 (语种 , 输出文本) , Function: (lang , output text) of a term
+        """
+        return self._entries.get(term , default)
+
+    def add(self, term:str, lang:str, text:str=None):
+        """
+        功能：添加或替换一个词条。
+        Function: Add or replace a term.\n
+        Args:
+            term (str): 词条原文 , term as it appears in the text
+            lang (str): 语种 , language, e.g. "ja"
+            text (str): 输出的读音文本，默认为词条本身 , pronunciation text to output, defaults to the term itself
+        """
+        if not term or not term.strip():raise ValueError("lexicon term must not be empty")
+        if not lang or not lang.strip():raise ValueError(f"lexicon term {term!r} has no language")
+        self._entries[term] = (lang.strip().lower() , text if text else term)
+        self._automaton = None
+        self.version += 1
+        pass
+
+    def update(self, entries):
+        """
+        功能：批量添加词条，格式同构造参数。
+        Function: Add many terms, same formats as the constructor.
+        """
+        items = entries.items() if isinstance(entries , dict) else entries
+        for item in items:
+            if isinstance(entries , dict):
+                term , value = item
+                item = (term , value) if isinstance(value , str) else (term , *value)
+            self.add(*item)
+        pass
+
+    def load(self, path, encoding="utf-8"):
+        """
+        功能：读取词典文件，每行 `词条<TAB>语种[<TAB>读音]`，空行与 # 开头的行忽略。
+        Function: Read a lexicon file with one `term<TAB>lang[<TAB>pronunciation]` per line; blank lines
+        and lines starting with # are skipped.\n
+        Returns:
+            Lexicon: self
+        """
+        with open(path , "r" , encoding=encoding) as file:
+            for number , line in enumerate(file , 1):
+                line = line.rstrip("\r\n")
+                if not line.strip() or line.startswith("#"):continue
+                columns = line.split("\t")
+                if len(columns) < 2 or len(columns) > 3:
+                    raise ValueError(f"{path}:{number}: expected term<TAB>lang[<TAB>pronunciation]")
+                self.add(*columns)
+        return self
+
+    def compile(self):
+        """
+        功能：编译 Aho-Corasick 自动机。修改后首次匹配时会自动编译，也可提前调用。
+        Function: Compile the Aho-Corasick automaton. It compiles on the first match after a change,
+        or can be called up front.\n
+        Returns:
+            Lexicon: self
+        """
+        self._compiled()
+        return self
+
+    def _compiled(self):
+        automaton = self._automaton
+        if automaton is not None:return automaton
+        with self._lock:
+            if self._automaton is None:self._automaton = self._build()
+            return self._automaton
+
+    def _build(self):
+        # 所有转移放在一个以 (状态 << 21 | 字符码) 为键的字典中，比每个状态一个字典省内存，也更快建立
+        # Every transition lives in one dict keyed by (state << 21 | code point), which takes less memory
+        # and builds faster than a dict per state
+        goto , depth , terms = {} , [0] , [None]
+        # 按子状态深度分组的边，用于按层求失败链接 , edges grouped by child depth, for the level-order failure links
+        levels = []
+        for term , (lang , text) in self._entries.items():
+            state = 0
+            for level , char in enumerate(term):
+                key = state << 21 | ord(char)
+                child = goto.get(key)
+                if child is None:
+                    child = goto[key] = len(depth)
+                    depth.append(level + 1)
+                    terms.append(None)
+                    if level == len(levels):levels.append([])
+                    levels[level].append((state , ord(char) , child))
+                state = child
+            terms[state] = (lang , text , _is_word(term[0]) , _is_word(term[-1]))
+        # 失败链接；output 为失败链上最近的词条状态（不含自身），用于列出所有以当前位置结尾的词条
+        # Failure links; output is the nearest state with a term on the failure chain (excluding the state
+        # itself), used to list every term ending at the current position
+        fail , output = [0] * len(depth) , [0] * len(depth)
+        for edges in levels[1:]:
+            for state , code , child in edges:
+                target = fail[state]
+                following = goto.get(target << 21 | code)
+                while following is None and target != 0:
+                    target = fail[target]
+                    following = goto.get(target << 21 | code)
+                if following is None:following = 0
+                fail[child] = following
+                output[child] = following if terms[following] is not None else output[following]
+        # 只能作为词条开头的字符，用于在根状态时跳过无关文本 , characters that can start a term, used to skip unrelated text at the root
+        heads = "".join(re.escape(chr(code)) for _ , code , _ in levels[0]) if levels else ""
+        starts = re.compile(f"[{heads}]") if heads else None
+        return goto , fail , output , depth , terms , starts
+
+    def finditer(self, text:str, pos:int=0, endpos:int=None):
+        """
+        功能：在 text[pos:endpos] 中查找词条，单词边界按全文判断。
+        Function: Find the terms in text[pos:endpos], word boundaries are judged on the whole text.\n
+        Returns:
+            list: [(start , end , lang , output_text),...] , 按位置排序 , in text order
+        """
+        goto , fail , output , depth , terms , starts = self._compiled()
+        if starts is None:return []
+        if endpos is None or endpos > len(text):endpos = len(text)
+        candidates = []
+        state , index = 0 , pos
+        while index < endpos:
+            if state == 0:
+                matche = starts.search(text , index , endpos)
+                if matche is None:break
+                index = matche.start()
+            code = ord(text[index])
+            index += 1
+            following = goto.get(state << 21 | code)
+            while following is None and state != 0:
+                state = fail[state]
+                following = goto.get(state << 21 | code)
+            state = following if following is not None else 0
+            found = state if terms[state] is not None else output[state]
+            while found:
+                lang , value , head , tail = terms[found]
+                start = index - depth[found]
+                if (not head or start == 0 or not _is_word(text[start - 1])) and (not tail or index == len(text) or not _is_word(text[index])):
+                    candidates.append((start , -index , lang , value))
+                found = output[found]
+        # 最左最长，互不重叠 , leftmost-longest, non-overlapping
+        candidates.sort()
+        matches , end = [] , pos
+        for start , stop , lang , value in candidates:
+            if start < end:continue
+            end = -stop
+            matches.append((start , end , lang , value))
+        return matches
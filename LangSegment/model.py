@@ -0,0 +1,417 @@
+"""
+py3langid 模型包装：按过滤器的语言集合缓存受限的识别器，只对需要的语种打分。
+py3langid 与 numpy 在第一次识别（或 warmup）时才导入，模型同时加载，import LangSegment 保持轻量。
+py3langid model wrapper: caches identifiers restricted to the language set of the active filters,
+so only the languages that matter are scored. py3langid and numpy are imported, and the model
+loaded, on the first classification (or warmup), which keeps `import LangSegment` light.
+
+模型可导出为平铺的 .npy 数组目录，以内存映射方式加载：多个工作进程共享同一份物理内存，无需各自解压。
+The model can be exported to a directory of flat .npy arrays and loaded memory-mapped, so worker
+processes share one physical copy of the weights instead of each decompressing the model.
+
+    python -c "import LangSegment; LangSegment.exportModel('./langid-model')"
+    LANGSEGMENT_MODEL=./langid-model gunicorn ...
+"""
+
+import copy
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+from functools import lru_cache
+
+# 延迟导入 , imported lazily by _import()
+np = None
+langid = None
+_visit_counts = None
+
+
+# 分词器重点处理的语种，受限模型始终保留它们，过滤器才能继续清除这些语种的内容
+# Core languages of the segmenter. Restricted models always keep them so the filters can still drop their content
+CORE_LANGUAGES = ("zh", "ja", "en", "ko")
+
+_FILTER_SPLIT = re.compile(r'[\s_,|-]+')
+
+
+@lru_cache(maxsize=256)
+def filter_languages(filters):
+    """
+    功能：将过滤器解析为语种集合，None 表示不限制（"all"、"*" 或空过滤器）。
+    Function: Parse filters into a language set, None meaning unrestricted ("all", "*" or empty filters).\n
+    Args:
+        filters (tuple): ("zh", "en") , ("zh_ja",) , ("all",)
+    Returns:
+        frozenset | None
+    """
+    if filters is None or len(filters) == 0:return None
+    if filters[0] == "*" or filters[0] in "alls-mixs-autos":return None
+    langs = set()
+    for item in filters:
+        langs.update(code.lower() for code in _FILTER_SPLIT.split(item) if code)
+    return frozenset(langs) if len(langs) > 0 else None
+
+
+def _import():
+    global np , langid , _visit_counts
+    if langid is None:
+        import numpy
+        import py3langid
+        np = numpy
+        # py3langid >= 0.4：DFA 计数为稀疏特征 , DFA visit counts as sparse features
+        _visit_counts = getattr(py3langid.langid , "visit_counts" , None)
+        langid = py3langid
+    return langid
+
+
+class LangModel():
+    """
+    py3langid 识别器的包装，线程安全。受限识别器是全量识别器的副本，不会修改 py3langid 的全局状态。
+    Thread-safe wrapper of a py3langid identifier. Restricted identifiers are copies, py3langid's global state is never modified.
+    """
+
+    def __init__(self, identifier=None):
+        self._identifier = identifier
+        self._restricted = {}
+        self._lock = threading.Lock()
+        # 批量打分函数，按识别器提供的属性在加载后选定一次 , batch scoring function, chosen once per loaded model from the identifier's attributes
+        self._batch = None
+        # 导出模型的目录，使用 py3langid 自带模型时为 None , directory of the exported model, None for py3langid's own model
+        self.path = None
+        # 持久化的识别缓存（cache.DiskCache），None 为关闭 , persistent classification cache (cache.DiskCache), None when off
+        self.store = None
+        pass
+
+    def setstore(self, store):
+        """
+        功能：设置持久化的识别缓存，None 为关闭；旧的缓存会先写入并关闭。
+        Function: Set the persistent classification cache, None turns it off; the previous one is flushed and closed.
+        """
+        previous , self.store = self.store , store
+        if previous is not None and previous is not store:previous.close()
+        pass
+
+    @property
+    def identifier(self):
+        identifier = self._identifier
+        if identifier is None:
+            with self._lock:
+                if self._identifier is None:
+                    # 设置了 LANGSEGMENT_MODEL 时使用导出的内存映射模型 , use the exported memory-mapped model when LANGSEGMENT_MODEL is set
+                    path = os.environ.get(MODEL_ENV)
+                    self._identifier = open_model(path) if path else _global_identifier()
+                    self.path = path or None
+                identifier = self._identifier
+        return identifier
+
+    def load(self, path, mmap=True):
+        """
+        功能：改用 save 导出的模型，默认以内存映射方式加载。
+        Function: Switch to a model exported by save, memory-mapped by default.
+        """
+        identifier = open_model(path , mmap)
+        with self._lock:
+            self._identifier = identifier
+            self._restricted = {}
+            self._batch = None
+            self.path = path
+        # 模型变化后持久化缓存按新的模型版本重新打开，旧结果作废
+        # After a model change the persistent cache reopens under the new model version, dropping old results
+        store = self.store
+        if store is not None:self.setstore(type(store)(store.path , store.max_entries , model_version(path) , store.flush_every))
+        return self
+
+    def save(self, path):
+        """
+        功能：将完整模型导出为 path 目录下的 .npy 数组与 meta.json。
+        Function: Export the full model to .npy arrays plus meta.json in the directory path.
+        """
+        save_model(self.identifier , path)
+        pass
+
+    @property
+    def loaded(self):
+        return self._identifier is not None
+
+    @property
+    def languages(self):
+        return list(dict.fromkeys(self.identifier.nb_classes))
+
+    def restricted(self, langs):
+        """
+        功能：返回只对 langs（及核心语种）打分的识别器，按语种集合缓存。
+        Function: Return an identifier scoring only langs (plus the core languages), cached per language set.
+        """
+        if langs is None:return self.identifier
+        identifier = self._restricted.get(langs)
+        if identifier is not None:return identifier
+        full = self.identifier
+        known = set(full.nb_classes)
+        keep = [code for code in dict.fromkeys(tuple(langs) + CORE_LANGUAGES) if code in known]
+        if len(keep) == 0 or len(keep) >= len(known):
+            identifier = full
+        else:
+            identifier = copy.copy(full)
+            identifier.set_languages(keep)
+        with self._lock:
+            if full is self._identifier:identifier = self._restricted.setdefault(langs , identifier)
+        return identifier
+
+    def classify(self, text, langs=None):
+        """
+        功能：识别语种，langs 为限制的语种集合（frozenset），None 为全部语种。
+        Function: Identify the language, langs restricts the candidates (frozenset), None for all languages.\n
+        Returns:
+            tuple: (language , score)
+        """
+        store = self.store
+        if store is None:return self.restricted(langs).classify(text)
+        result = store.get(langs , text)
+        if result is None:
+            result = self.restricted(langs).classify(text)
+            store.put(langs , text , result)
+        return result
+
+    def warmup(self, langs=None):
+        """
+        功能：立即加载模型与受限识别器，并完成一次识别，使其页面常驻内存。
+        在 fork 之前于父进程调用，子进程可共享已加载的模型页面。
+        Function: Load the model and the restricted identifier now and run one classification so their pages are resident.
+        Call it in the parent before forking and the workers share the loaded model pages.
+        """
+        self.restricted(langs).classify("warmup")
+        pass
+
+    def classify_batch(self, texts, langs=None, chunksize=256):
+        """
+        功能：批量识别语种，所有文本的特征一起打分，结果同逐条调用 classify。
+        Function: Identify the languages of many texts, scoring their features together; same results as calling classify one by one.\n
+        Returns:
+            list: [(language , score),...]
+        """
+        store = self.store
+        if store is None:return self._classify_batch(texts , langs , chunksize)
+        # 只对缓存未命中的文本打分，全部命中时不加载模型 , only the misses are scored, the model is not loaded when everything hits
+        found = store.get_many(langs , texts)
+        missing = [text for text in dict.fromkeys(texts) if text not in found]
+        if len(missing) > 0:
+            results = self._classify_batch(missing , langs , chunksize)
+            store.put_many(langs , zip(missing , results))
+            found.update(zip(missing , results))
+        return [found[text] for text in texts]
+
+    def _classify_batch(self, texts, langs, chunksize):
+        _import()
+        identifier = self.restricted(langs)
+        batch = self._batch
+        if batch is None:batch = self._batch = _batch_function(self.identifier)
+        if batch is _each_batch:return _each_batch(identifier , texts)
+        results = []
+        for i in range(0 , len(texts) , chunksize):
+            results.extend(batch(identifier , texts[i:i + chunksize]))
+        return results
+
+
+# 批量打分依赖的 py3langid 属性（含私有属性），缺少任何一个时退回下一种方式
+# py3langid attributes (private ones included) each batch path relies on; missing any falls back to the next path
+_SPARSE_ATTRS = ("_encode" , "tk_nextmove" , "_rowbase" , "tk_output" , "_norm_probs" , "_alias_pairs" ,
+                 "nb_ptc" , "nb_pc" , "nb_classes" , "min_confidence")
+_DENSE_ATTRS  = ("instance2fv" , "tk_nextmove" , "tk_output" , "nb_ptc" , "nb_pc" , "nb_classes" , "norm_probs")
+
+def _batch_function(identifier):
+    # 按识别器实际提供的属性选择批量方式：稀疏 DFA 计数、稠密 DFA 计数，或逐条 classify
+    # Pick the batch path from the attributes the identifier really has: sparse DFA counts, dense DFA counts or per-item classify
+    if (_visit_counts is not None and hasattr(langid.langid , "RAW_FLOOR") and
+            all(hasattr(identifier , name) for name in _SPARSE_ATTRS)):
+        return _sparse_batch
+    if isinstance(getattr(identifier , "tk_output" , None) , dict) and all(hasattr(identifier , name) for name in _DENSE_ATTRS):
+        return _dense_batch
+    return _each_batch
+
+def _each_batch(identifier , texts):
+    return [identifier.classify(text) for text in texts]
+
+def _sum_features(table , visits , weight , scores):
+    # 所有文本的特征行一次取出并按文本求和（reduceat），代替逐条的向量乘矩阵
+    # Gather the feature rows of every text at once and sum them per text (reduceat) instead of one product per text
+    indexes , counts , starts , rows = [] , [] , [] , []
+    for row , counter in enumerate(visits):
+        if not counter:continue
+        starts.append(len(indexes))
+        rows.append(row)
+        indexes.extend(counter.keys())
+        counts.extend(counter.values())
+    if len(rows) == 0:return scores
+    weights = weight(np.asarray(counts , dtype=np.float32))
+    features = table[np.asarray(indexes , dtype=np.intp)] * weights[:,None]
+    scores[rows] += np.add.reduceat(features , starts , axis=0)
+    return scores
+
+def _sparse_batch(identifier , texts):
+    encoded = [identifier._encode(text) for text in texts]
+    nextmove , rowbase , output = identifier.tk_nextmove , identifier._rowbase , identifier.tk_output
+    visits = [_visit_counts(nextmove , rowbase , output , text) for text in encoded]
+    norm_probs , floor = identifier._norm_probs , langid.langid.RAW_FLOOR
+    scores = np.zeros((len(texts) , len(identifier.nb_classes)) , dtype=np.float32)
+    scores = _sum_features(identifier.nb_ptc , visits , np.log1p , scores)
+    scores += identifier.nb_pc
+    # 没有特征的文本与逐条识别一致 , texts without features match the per-text result
+    empty = [row for row , counter in enumerate(visits) if not counter]
+    if len(empty) > 0:scores[empty] = 0.0 if norm_probs else floor
+    if norm_probs:
+        scores *= np.asarray([1.0 / math.sqrt(len(text) or 1) for text in encoded] , dtype=np.float32)[:,None]
+        np.exp(scores - scores.max(axis=1 , keepdims=True) , out=scores)
+        scores /= scores.sum(axis=1 , keepdims=True)
+    for i , j in identifier._alias_pairs:
+        if norm_probs:
+            scores[:,i] += scores[:,j]
+            scores[:,j] = 0.0
+        else:
+            np.maximum(scores[:,i] , scores[:,j] , out=scores[:,i])
+            scores[:,j] = floor
+    best = scores.argmax(axis=1)
+    confs = scores[np.arange(len(texts)) , best].tolist()
+    classes , min_confidence = identifier.nb_classes , identifier.min_confidence
+    return [("und" , conf) if min_confidence is not None and conf < min_confidence else (classes[i] , conf)
+            for i , conf in zip(best.tolist() , confs)]
+
+def _dense_visits(identifier , text):
+    # 同 instance2fv 的 DFA，但返回稀疏计数而不是稠密向量
+    # Same DFA as instance2fv, but returns sparse counts instead of a dense vector
+    if isinstance(text , str):text = text.encode('utf8' , errors='surrogatepass')
+    nextmove , output = identifier.tk_nextmove , identifier.tk_output
+    state , indexes = 0 , []
+    for letter in text:
+        state = nextmove[(state << 8) + letter]
+        indexes.extend(output.get(state , ()))
+    return Counter(indexes)
+
+def _dense_batch(identifier , texts):
+    # py3langid 0.2 / 0.3：特征为原始计数 , features are raw counts
+    visits = [_dense_visits(identifier , text) for text in texts]
+    scores = np.zeros((len(texts) , len(identifier.nb_classes)) , dtype=identifier.nb_ptc.dtype)
+    scores = _sum_features(identifier.nb_ptc , visits , lambda counts:counts , scores)
+    scores += identifier.nb_pc
+    results = []
+    for row in scores:
+        probs = identifier.norm_probs(row)
+        best = int(np.argmax(probs))
+        results.append((identifier.nb_classes[best] , probs[best]))
+    return results
+
+
+# 导出格式 , export format
+MODEL_ENV = "LANGSEGMENT_MODEL"
+MODEL_FORMAT = 1
+
+def _full_model(identifier):
+    # 受限过的识别器同样导出完整模型 , a restricted identifier still exports the full model
+    for name in ("_full_model" , "_LanguageIdentifier__full_model"):
+        full = getattr(identifier , name , None)
+        if full is not None:return full
+    return identifier.nb_ptc , identifier.nb_pc , identifier.nb_classes
+
+def save_model(identifier , path):
+    """
+    功能：导出模型：权重与 DFA 表各存为一个 .npy，结构信息存入 meta.json。
+    Function: Export a model: weights and DFA tables as one .npy each, layout in meta.json.
+    """
+    _import()
+    nb_ptc , nb_pc , nb_classes = _full_model(identifier)
+    os.makedirs(path , exist_ok=True)
+    arrays = {"nb_ptc": np.asarray(nb_ptc) , "nb_pc": np.asarray(nb_pc) , "tk_nextmove": np.asarray(identifier.tk_nextmove)}
+    if hasattr(identifier , "tk_row"):
+        # py3langid >= 0.4：共享的 DFA 行与逐状态的输出特征 , shared DFA rows and one output feature per state
+        layout = "rows"
+        arrays["tk_row"] = np.asarray(identifier.tk_row)
+        arrays["tk_output"] = np.asarray(identifier.tk_output , dtype=np.int32)
+        norm_probs = getattr(identifier , "_norm_probs" , False)
+    else:
+        # py3langid 0.2 / 0.3：输出为 {状态: (特征,...)} , outputs are {state: (feature,...)}
+        layout = "states"
+        output = sorted(identifier.tk_output.items())
+        arrays["output_states"] = np.asarray([state for state , _ in output] , dtype=np.int64)
+        arrays["output_offsets"] = np.cumsum([0] + [len(values) for _ , values in output] , dtype=np.int64)
+        arrays["output_values"] = np.asarray([value for _ , values in output for value in values] , dtype=np.int64)
+        norm_probs = None
+    for name , array in arrays.items():np.save(os.path.join(path , f"{name}.npy") , np.ascontiguousarray(array))
+    meta = {
+        "format": MODEL_FORMAT,
+        "layout": layout,
+        "classes": list(nb_classes),
+        "norm_probs": norm_probs,
+        "py3langid": getattr(langid , "__version__" , None),
+    }
+    with open(os.path.join(path , "meta.json") , "w" , encoding="utf-8") as f:json.dump(meta , f , indent=2)
+    pass
+
+def open_model(path , mmap=True):
+    """
+    功能：加载 save_model 导出的模型。mmap=True 时权重与 DFA 表直接映射文件，多进程共享同一份物理内存。
+    Function: Load a model exported by save_model. With mmap=True the weights and DFA tables map the files
+    directly, so processes share one physical copy.
+    """
+    module = _import().langid
+    with open(os.path.join(path , "meta.json") , encoding="utf-8") as f:meta = json.load(f)
+    if meta.get("format") != MODEL_FORMAT:raise ValueError(f"{path}: unsupported model format {meta.get('format')!r}")
+    def load(name):
+        return np.load(os.path.join(path , f"{name}.npy") , mmap_mode="r" if mmap else None , allow_pickle=False)
+    def table(name):
+        # DFA 表逐项访问，memoryview 与 array 一样快，ndarray 逐项访问则慢得多
+        # DFA tables are indexed item by item: a memoryview is as fast as array, an ndarray is much slower
+        return memoryview(load(name))
+    nb_ptc , nb_pc , classes = load("nb_ptc") , load("nb_pc") , meta["classes"]
+    has_rows = "tk_row" in module.LanguageIdentifier.__init__.__code__.co_varnames
+    if meta["layout"] == "rows":
+        if not has_rows:raise ValueError(f"{path}: exported with py3langid {meta.get('py3langid')}, needs py3langid >= 0.4")
+        return module.LanguageIdentifier(nb_ptc , nb_pc , classes , table("tk_nextmove") , table("tk_output") ,
+                                         norm_probs=meta["norm_probs"] , tk_row=table("tk_row"))
+    if has_rows:raise ValueError(f"{path}: exported with py3langid {meta.get('py3langid')}, needs py3langid < 0.4")
+    states , offsets , values = load("output_states").tolist() , load("output_offsets").tolist() , load("output_values").tolist()
+    tk_output = {state:tuple(values[offsets[i]:offsets[i + 1]]) for i , state in enumerate(states)}
+    return module.LanguageIdentifier(nb_ptc , nb_pc , nb_ptc.shape[0] , classes , table("tk_nextmove") , tk_output)
+
+def _model_stamp(path):
+    # 导出目录中各文件的名称、大小与修改时间的摘要 , digest of the name, size and mtime of every file in the export directory
+    digest = hashlib.sha1()
+    for name in sorted(os.listdir(path)):
+        if not name.endswith((".npy" , ".json")):continue
+        stat = os.stat(os.path.join(path , name))
+        digest.update(f"{name}:{stat.st_size}:{stat.st_mtime_ns};".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+def model_version(path=None):
+    """
+    功能：识别缓存使用的模型版本，不导入 py3langid。使用 loadModel 或 LANGSEGMENT_MODEL 的导出模型时包含其文件摘要。
+    Function: Model version used by the classification cache, read without importing py3langid. With an exported
+    model from loadModel or LANGSEGMENT_MODEL it includes a digest of the model files.\n
+    Args:
+        path (str): 导出模型的目录，默认为当前加载或将要加载的模型 , exported model directory, defaults to the loaded (or to be loaded) model
+    """
+    try:
+        from importlib.metadata import version
+        name = f"py3langid {version('py3langid')}"
+    except Exception:
+        name = "py3langid"
+    if path is None:path = model.path if model.loaded else os.environ.get(MODEL_ENV)
+    if not path:return name
+    try:
+        return f"{name} model {_model_stamp(path)}"
+    except OSError:
+        return f"{name} model {os.path.abspath(path)}"
+
+def _global_identifier():
+    # 兼容不同版本的 py3langid：优先复用其全局识别器
+    # Compatible with py3langid versions: reuse its global identifier
+    module = _import().langid
+    if hasattr(module , "_get_identifier"):return module._get_identifier()
+    if getattr(module , "IDENTIFIER" , None) is None:module.load_model()
+    return module.IDENTIFIER
+
+
+# 默认模型，所有分词器共享
+# Default model shared by every segmenter
+model = LangModel()
+
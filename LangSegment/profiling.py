@@ -0,0 +1,272 @@
+"""
+性能剖析：在 cProfile 或采样剖析器下运行分词，统计各内部阶段（占位符替换、标签处理、片段识别、结果合并、模型）的耗时，
+并输出折叠栈（collapsed stack）格式，可直接交给 flamegraph.pl / speedscope / inferno 生成火焰图。
+Profiling: runs segmentation under cProfile or a sampling profiler, attributes time to the internal stages
+(placeholder passes, tag processing, fragment classification, merging, the model) and writes collapsed-stack
+output that flamegraph.pl / speedscope / inferno read directly.
+
+    with LangSegment.profile() as profiler:
+        for text in corpus:LangSegment.getTexts(text)
+    print(profiler.report())
+    profiler.write_collapsed("segment.folded")
+
+    python -m LangSegment corpus.txt -o out.jsonl --profile segment.folded --profile-mode sample
+"""
+
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+
+from .LangSegment import Segmenter
+
+
+# 内部阶段：(名称 , 文件名 , 函数名)，时间按函数名归属 , internal stages: (label , file name , function name), time is attributed by function
+STAGES = (
+    ("_pattern_symbols" , "LangSegment.py" , "_pattern_symbols"),
+    ("_lexicon_symbols" , "LangSegment.py" , "_lexicon_symbols"),
+    ("_process_tags"    , "LangSegment.py" , "_process_tags"),
+    ("_parse_language"  , "LangSegment.py" , "_parse_language"),
+    ("_addwords"        , "LangSegment.py" , "_addwords"),
+    ("_restore_number"  , "LangSegment.py" , "_restore_number"),
+    ("model.classify"   , "model.py"       , "classify"),
+    ("model.classify_batch" , "model.py"   , "classify_batch"),
+    ("langid.classify"  , "langid.py"      , "classify"),
+)
+MODES = ("cprofile" , "sample")
+
+# cProfile 转折叠栈时忽略的调用比例下限（秒），避免枚举大量可忽略的路径
+# Paths below this weight (seconds) are dropped when cProfile data is folded, so negligible paths are not enumerated
+MIN_WEIGHT = 1e-6
+
+
+def _label(filename , lineno , name):
+    # 折叠栈的帧名，分号是帧分隔符，不能出现在名称中 , frame name for collapsed stacks, ";" separates frames and cannot appear in it
+    if filename == "~":return name.replace(";" , ",")
+    return f"{name} ({os.path.basename(filename)}:{lineno})".replace(";" , ",")
+
+def _stage_keys():
+    return {(filename , name):label for label , filename , name in STAGES}
+
+
+class Profiler():
+    """
+    剖析上下文：with 块内的分词在 cProfile（mode="cprofile"，确定性、有调用次数）或采样剖析器
+    （mode="sample"，开销低、栈准确）下运行。只剖析进入 with 块的线程。
+    Profiling context: segmentation inside the with block runs under cProfile (mode="cprofile", deterministic,
+    with call counts) or a sampling profiler (mode="sample", low overhead, exact stacks). Only the thread
+    that entered the block is profiled.
+    """
+
+    def __init__(self, mode="cprofile", interval=0.001):
+        """
+        Args:
+            mode (str): "cprofile" 或 "sample" , "cprofile" or "sample"
+            interval (float): 采样间隔秒数，仅 sample 模式 , sampling interval in seconds, sample mode only
+        """
+        if mode not in MODES:raise ValueError(f"unknown profile mode {mode!r}, expected one of {', '.join(MODES)}")
+        self.mode = mode
+        self.interval = interval
+        self.elapsed = 0.0
+        # cprofile 模式的 pstats.Stats , pstats.Stats of the cprofile mode
+        self.stats = None
+        # sample 模式：调用栈（code 对象元组）-> 样本数 , sample mode: stack (tuple of code objects) -> sample count
+        self.samples = {}
+        self._profile = None
+        self._thread = None
+        self._started = None
+        pass
+
+    def __enter__(self):
+        self.start(sys._getframe(1))
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    def start(self, base=None):
+        """
+        功能：开始剖析。base 为采样栈的最外层帧，默认为调用者。
+        Function: Start profiling. base is the outermost frame kept in sampled stacks, the caller by default.
+        """
+        self.samples = {}
+        self.stats = None
+        self._started = time.perf_counter()
+        if self.mode == "cprofile":
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+            return self
+        self._base = base if base is not None else sys._getframe(1)
+        self._target = threading.get_ident()
+        self._stopping = threading.Event()
+        # 采样线程需要拿到 GIL，缩短切换间隔，否则采样间隔实际不会小于 5ms
+        # The sampler needs the GIL, so shorten the switch interval, otherwise samples are never closer than 5 ms
+        self._switch = sys.getswitchinterval()
+        sys.setswitchinterval(min(self._switch , self.interval / 4))
+        self._thread = threading.Thread(target=self._sample , name="LangSegment-profiler" , daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._profile is not None:
+            self._profile.disable()
+            self.stats = pstats.Stats(self._profile)
+            self._profile = None
+        if self._thread is not None:
+            self._stopping.set()
+            self._thread.join()
+            self._thread = None
+            sys.setswitchinterval(self._switch)
+            self._base = None
+        self.elapsed = time.perf_counter() - self._started
+        return self
+
+    def _sample(self):
+        current_frames = sys._current_frames
+        target , base , samples = self._target , self._base , self.samples
+        while not self._stopping.wait(self.interval):
+            frame = current_frames().get(target)
+            stack = []
+            while frame is not None:
+                stack.append(frame.f_code)
+                if frame is base:break
+                frame = frame.f_back
+            if len(stack) == 0:continue
+            stack = tuple(reversed(stack))
+            samples[stack] = samples.get(stack , 0) + 1
+        pass
+
+    def _functions(self):
+        # cProfile 数据中去掉剖析器自身的调用 , cProfile data without the profiler's own calls
+        own = os.path.abspath(__file__)
+        return {func:value for func , value in self.stats.stats.items()
+                if not (func[0] != "~" and os.path.abspath(func[0]) == own) and "_lsprof.Profiler" not in func[2]}
+
+    def stages(self):
+        """
+        功能：各内部阶段的耗时。self 为函数自身耗时，total 含其调用的函数；sample 模式没有调用次数（None）。
+        Function: Time of each internal stage. self is the function's own time, total includes its callees;
+        the sample mode has no call counts (None).\n
+        Returns:
+            dict: {"_parse_language": {"calls": 120, "self": 0.01, "total": 0.05},...} , 单位为秒 , in seconds
+        """
+        keys = _stage_keys()
+        result = {label:{"calls": 0 if self.mode == "cprofile" else None, "self": 0.0, "total": 0.0} for label , _ , _ in STAGES}
+        if self.mode == "cprofile":
+            if self.stats is None:return result
+            for (filename , lineno , name) , (cc , nc , tt , ct , callers) in self._functions().items():
+                label = keys.get((os.path.basename(filename) , name))
+                if label is None:continue
+                item = result[label]
+                item["calls"] += nc
+                item["self"] += tt
+                item["total"] += ct
+            return result
+        total = sum(self.samples.values())
+        if total == 0:return result
+        # 每个样本代表的墙钟时间 , wall time represented by one sample
+        unit = self.elapsed / total
+        for stack , count in self.samples.items():
+            seen = set()
+            for code in stack:
+                label = keys.get((os.path.basename(code.co_filename) , code.co_name))
+                if label is None or label in seen:continue
+                seen.add(label)
+                result[label]["total"] += count * unit
+            label = keys.get((os.path.basename(stack[-1].co_filename) , stack[-1].co_name))
+            if label is not None:result[label]["self"] += count * unit
+        return result
+
+    def collapsed(self):
+        """
+        功能：折叠栈，每行 `帧;帧;帧 权重`。sample 模式权重为样本数，cprofile 模式为微秒（按调用关系比例分摊的近似值）。
+        Function: Collapsed stacks, one `frame;frame;frame weight` per line. The weight is the sample count in
+        sample mode and microseconds in cprofile mode (an approximation apportioned along the call graph).\n
+        Returns:
+            list: [str,...]
+        """
+        folded = {}
+        if self.mode == "sample":
+            for stack , count in self.samples.items():
+                key = ";".join(_label(code.co_filename , code.co_firstlineno , code.co_name) for code in stack)
+                folded[key] = folded.get(key , 0) + count
+        elif self.stats is not None:
+            self._fold(folded)
+        return [f"{stack} {weight}" for stack , weight in sorted(folded.items()) if weight > 0]
+
+    def _fold(self, folded):
+        # cProfile 只记录调用者与被调用者，按边的累计时间占比把每个函数的时间分摊到各条调用路径上
+        # cProfile only records caller/callee pairs: each function's time is apportioned to its call paths
+        # by the share of cumulative time on every edge
+        functions = self._functions()
+        children = {}
+        for func , (cc , nc , tt , ct , callers) in functions.items():
+            for caller , edge in callers.items():
+                if caller in functions:children.setdefault(caller , []).append((func , edge[3]))
+        def visit(func , weight , path , names):
+            cc , nc , tt , ct , callers = functions[func]
+            if ct <= 0:return
+            for child , edge in children.get(func , ()):
+                if child in path:continue
+                share = weight * edge / ct
+                if share >= MIN_WEIGHT:visit(child , share , path | {child} , names + (_label(*child) ,))
+            key = ";".join(names)
+            folded[key] = folded.get(key , 0) + int(round(weight * tt / ct * 1e6))
+            pass
+        for func , (cc , nc , tt , ct , callers) in functions.items():
+            if any(caller in functions for caller in callers):continue
+            visit(func , ct , {func} , (_label(*func) ,))
+        pass
+
+    def write_collapsed(self, path):
+        """
+        功能：把折叠栈写入文件，供火焰图工具读取。
+        Function: Write the collapsed stacks to a file for flamegraph tools.
+        """
+        with open(path , "w" , encoding="utf-8") as f:
+            for line in self.collapsed():
+                f.write(line)
+                f.write("\n")
+        pass
+
+    def report(self):
+        """
+        功能：各阶段耗时的文本表格 , Function: text table of the stage timings
+        """
+        lines = [f'{"stage":<22} {"calls":>9} {"self s":>9} {"total s":>9} {"total %":>8}']
+        elapsed = self.elapsed or 1.0
+        for label , item in self.stages().items():
+            calls = "-" if item["calls"] is None else str(item["calls"])
+            lines.append(f'{label:<22} {calls:>9} {item["self"]:>9.4f} {item["total"]:>9.4f} {item["total"] / elapsed:>8.1%}')
+        lines.append(f'{"elapsed":<22} {"":>9} {"":>9} {self.elapsed:>9.4f} ({self.mode})')
+        return "\n".join(lines)
+
+
+def profile(mode="cprofile", interval=0.001):
+    """
+    功能：剖析上下文管理器，with 块内的分词在剖析器下运行。
+    Function: Profiling context manager, segmentation inside the with block runs under the profiler.\n
+    Args:
+        mode (str): "cprofile"（确定性，有调用次数）或 "sample"（采样，开销低）
+            "cprofile" (deterministic, with call counts) or "sample" (sampling, low overhead)
+        interval (float): 采样间隔秒数 , sampling interval in seconds
+    Returns:
+        Profiler: profiler.report() / profiler.stages() / profiler.write_collapsed(path)
+    """
+    return Profiler(mode , interval)
+
+def profileTexts(texts, filters=None, mode="cprofile", interval=0.001):
+    """
+    功能：在剖析器下对语料逐条调用 getTexts（不使用结果缓存，模型在剖析前加载）。
+    Function: Run getTexts over a corpus under the profiler (no result cache, the model loads before profiling starts).\n
+    Returns:
+        Profiler: 同 profile() , same as profile()
+    """
+    segmenter = Segmenter(filters)
+    segmenter.warmup(filters)
+    with Profiler(mode , interval) as profiler:
+        for text in texts:segmenter.getTexts(text)
+    return profiler
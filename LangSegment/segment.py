@@ -0,0 +1,90 @@
+"""
+紧凑的分词结果：__slots__ 对象代替 {'lang','text'} 字典，同语种合并时只追加片段，读取 text 时才拼接。
+Compact segment results: __slots__ objects instead of {'lang','text'} dicts. Merging the same
+language only appends a piece; the pieces are joined once, when text is read.
+"""
+
+
+class Segment():
+    """
+    单个分词结果。兼容字典写法：segment["lang"] , segment["text"] , dict(segment)。
+    One segmentation result. Dict style access still works: segment["lang"] , segment["text"] , dict(segment).
+    """
+    __slots__ = ("lang", "_parts", "start", "end")
+
+    def __init__(self, lang, text="", start=None, end=None):
+        self.lang = lang
+        self._parts = [text]
+        # 在原文中的位置，仅 getSpans 时记录，否则为 None
+        # Offsets into the original text, recorded by getSpans only, otherwise None
+        self.start = start
+        self.end = end
+        pass
+
+    @property
+    def text(self):
+        parts = self._parts
+        if len(parts) > 1:
+            text = "".join(parts)
+            self._parts = parts = [text]
+        return parts[0]
+
+    @text.setter
+    def text(self, text):
+        self._parts = [text]
+        pass
+
+    def append(self, text, end=None):
+        # O(1) 合并 , O(1) merge
+        self._parts.append(text)
+        if end is not None:self.end = end
+        pass
+
+    def copy(self):
+        return Segment(self.lang , self.text , self.start , self.end)
+
+    def span(self):
+        return (self.start , self.end , self.lang , self.text)
+
+    def todict(self):
+        return {"lang": self.lang, "text": self.text}
+
+    def keys(self):
+        return ("lang", "text")
+
+    def __getitem__(self, key):
+        if key == "lang":return self.lang
+        if key == "text":return self.text
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key == "lang":self.lang = value
+        elif key == "text":self.text = value
+        else:raise KeyError(key)
+        pass
+
+    def __eq__(self, other):
+        if isinstance(other , (Segment , dict)):
+            return self.lang == other["lang"] and self.text == other["text"]
+        return NotImplemented
+
+    def __repr__(self):
+        return f"Segment(lang={self.lang!r}, text={self.text!r})"
+
+    def __getstate__(self):
+        return (self.lang , self.text , self.start , self.end)
+
+    def __setstate__(self, state):
+        self.lang , text , self.start , self.end = state
+        self._parts = [text]
+        pass
+
+
+def todicts(segments):
+    """
+    功能：转换为原有的字典格式。
+    Function: Convert to the legacy dict format.\n
+    Returns:
+        list: [{'lang':'zh','text':'?'},...]
+    """
+    return [segment.todict() for segment in segments]
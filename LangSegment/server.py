@@ -0,0 +1,306 @@
+"""
+HTTP 分词服务：只依赖标准库，JSON 接口，每个请求可指定自己的过滤器，不修改全局状态。
+微批调度器在几毫秒内收集并发请求，把它们需要模型的片段一起识别；有界队列在过载时立即返回 503，
+超过期限的请求不再处理，p99 延迟因此可预期。
+HTTP segmentation service on the standard library only: a JSON API where every request may carry its
+own filters, without touching global state. A micro-batching scheduler gathers concurrent requests for a
+few milliseconds and classifies the fragments they need together; a bounded queue answers 503 right away
+under overload and requests past their deadline are skipped, which keeps p99 latency predictable.
+
+    python -m LangSegment.server --port 8000 --filters zh,en,ja,ko
+
+    POST /segment  {"text": "...", "filters": ["zh", "en"]}  ->  {"segments": [...], "counts": [...]}
+    GET  /health   ->  {"status": "ok", "queue": 0}
+    GET  /stats    ->  {"scheduler": {...}, "model": {...}, "cache": {...}}
+"""
+
+import argparse
+import json
+import queue
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+from .LangSegment import Segmenter, setdiskcache
+
+
+class Overloaded(Exception):
+    """
+    队列已满，请求被拒绝（HTTP 503）。
+    The queue is full and the request was rejected (HTTP 503).
+    """
+    pass
+
+
+class _Job():
+    __slots__ = ("text", "filters", "deadline", "event", "result", "error")
+
+    def __init__(self, text, filters, deadline):
+        self.text = text
+        self.filters = filters
+        self.deadline = deadline
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        pass
+
+
+class MicroBatcher():
+    """
+    微批调度器：单个后台线程从有界队列取出请求，最多等待 max_wait 秒凑满 max_batch 条后一起分词。
+    Micro-batching scheduler: one background thread takes requests from a bounded queue, waits at most
+    max_wait seconds to gather up to max_batch of them, and segments them together.
+    """
+
+    def __init__(self, segmenter=None, max_batch=64, max_wait=0.002, max_queue=1024, timeout=5.0):
+        """
+        Args:
+            segmenter (Segmenter): 使用的分词器 , segmenter to use
+            max_batch (int): 每批最多请求数 , max requests per batch
+            max_wait (float): 凑批的最长等待秒数 , max seconds spent gathering a batch
+            max_queue (int): 排队请求上限，超出时拒绝 , max queued requests, more are rejected
+            timeout (float): 请求期限秒数，过期的请求不再处理 , request deadline in seconds, expired requests are skipped
+        """
+        self.segmenter = segmenter if segmenter is not None else Segmenter()
+        self.max_batch = max(1 , max_batch)
+        self.max_wait = max_wait
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._queue = queue.Queue(max_queue)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._counters = dict.fromkeys(("accepted" , "rejected" , "expired" , "batches" , "items") , 0)
+        pass
+
+    def _count(self, name, value=1):
+        with self._lock:self._counters[name] += value
+        pass
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run , name="LangSegment-batcher" , daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        thread , self._thread = self._thread , None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+        pass
+
+    def submit(self, text, filters=None, timeout=None):
+        """
+        功能：提交一条文本并等待结果。队列已满时抛出 Overloaded，超过期限抛出 TimeoutError。
+        Function: Submit one text and wait for its result. Raises Overloaded when the queue is full and
+        TimeoutError past the deadline.\n
+        Returns:
+            tuple: (segments , counts) , segments同getTexts，counts同getCounts
+        """
+        timeout = self.timeout if timeout is None else timeout
+        job = _Job(text , filters , time.monotonic() + timeout)
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            self._count("rejected")
+            raise Overloaded(f"queue is full ({self.max_queue})")
+        self._count("accepted")
+        if not job.event.wait(timeout):raise TimeoutError("request deadline exceeded")
+        if job.error is not None:raise job.error
+        return job.result
+
+    def _run(self):
+        source = self._queue
+        while True:
+            job = source.get()
+            if job is None:break
+            jobs = [job]
+            end = time.monotonic() + self.max_wait
+            while len(jobs) < self.max_batch:
+                remaining = end - time.monotonic()
+                try:
+                    job = source.get(timeout=remaining) if remaining > 0 else source.get_nowait()
+                except queue.Empty:
+                    break
+                if job is None:
+                    source.put(None)
+                    break
+                jobs.append(job)
+            self._process(jobs)
+        pass
+
+    def _process(self, jobs):
+        # 已过期的请求直接丢弃，不再占用处理时间 , expired requests are dropped without spending work on them
+        now = time.monotonic()
+        live = []
+        for job in jobs:
+            if job.deadline > now:
+                live.append(job)
+                continue
+            job.error = TimeoutError("request deadline exceeded")
+            job.event.set()
+        self._count("expired" , len(jobs) - len(live))
+        if len(live) == 0:return
+        try:
+            results = self.segmenter._batch_items([(job.text , job.filters) for job in live])
+            for job , result in zip(live , results):job.result = result
+        except Exception:
+            # 批处理失败时逐条重试，只有出错的请求收到错误 , on a batch failure retry item by item so only the failing request gets the error
+            for job in live:
+                try:
+                    job.result = self.segmenter._batch_items([(job.text , job.filters)])[0]
+                except Exception as e:
+                    job.error = e
+        for job in live:job.event.set()
+        self._count("batches")
+        self._count("items" , len(live))
+        pass
+
+    def stats(self):
+        """
+        功能：调度统计 , Function: scheduler statistics\n
+        Returns:
+            dict: {"queue","max_queue","accepted","rejected","expired","batches","items","avg_batch"}
+        """
+        with self._lock:stats = dict(self._counters)
+        stats["queue"] = self._queue.qsize()
+        stats["max_queue"] = self.max_queue
+        stats["avg_batch"] = stats["items"] / stats["batches"] if stats["batches"] > 0 else 0.0
+        return stats
+
+
+def _filters(value):
+    # 过滤器：字符串列表或单个字符串 , filters: a list of strings or one string
+    if value is None or isinstance(value , str):return value
+    if isinstance(value , list) and all(isinstance(item , str) for item in value):return value
+    raise ValueError("filters must be a string or a list of strings")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "LangSegment"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:super().log_message(format , *args)
+        pass
+
+    def _send(self, status, body, headers=()):
+        data = json.dumps(body , ensure_ascii=False).encode("utf-8" , "replace")
+        self.send_response(status)
+        self.send_header("Content-Type" , "application/json; charset=utf-8")
+        self.send_header("Content-Length" , str(len(data)))
+        for name , value in headers:self.send_header(name , value)
+        self.end_headers()
+        self.wfile.write(data)
+        pass
+
+    def _error(self, status, message, headers=()):
+        self._send(status , {"error": message} , headers)
+        pass
+
+    def do_GET(self):
+        batcher = self.server.batcher
+        if self.path == "/health":
+            self._send(200 , {"status": "ok", "queue": batcher._queue.qsize()})
+        elif self.path == "/stats":
+            segmenter = batcher.segmenter
+            self._send(200 , {"scheduler": batcher.stats(), "model": segmenter.getModelStats(), "cache": segmenter.getCacheStats()})
+        else:
+            self._error(404 , "not found")
+        pass
+
+    def do_POST(self):
+        if self.path != "/segment":
+            self.close_connection = True
+            return self._error(404 , "not found")
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length <= 0 or length > self.server.max_body:
+            # 未读取请求体，连接不能复用 , the body was not read, so the connection cannot be reused
+            self.close_connection = True
+            return self._error(413 if length > 0 else 411 , "a JSON body up to %d bytes is required" % self.server.max_body)
+        try:
+            body = json.loads(self.rfile.read(length))
+            text = body.get("text") if isinstance(body , dict) else None
+            if not isinstance(text , str):raise ValueError("text must be a string")
+            # 单独的代理码位无法编码输出 , lone surrogates cannot be encoded in the response
+            text.encode("utf-8")
+            filters = _filters(body.get("filters"))
+        except ValueError as e:
+            return self._error(400 , str(e))
+        try:
+            segments , counts = self.server.batcher.submit(text , filters)
+        except Overloaded as e:
+            return self._error(503 , str(e) , (("Retry-After" , "1") ,))
+        except TimeoutError as e:
+            return self._error(504 , str(e))
+        except Exception as e:
+            return self._error(500 , "%s: %s" % (type(e).__name__ , e))
+        self._send(200 , {"segments": segments, "counts": counts})
+        pass
+
+
+class SegmentServer(ThreadingMixIn, HTTPServer):
+    """
+    分词 HTTP 服务，每个连接一个线程，分词统一交给微批调度器。
+    Segmentation HTTP server: one thread per connection, all segmentation goes through the micro-batching scheduler.
+    """
+    daemon_threads = True
+    block_on_close = False
+    # 监听队列，默认的 5 在并发连接下会被重置 , listen backlog, the default of 5 resets connections under concurrency
+    request_queue_size = 1024
+
+    def __init__(self, address, batcher=None, max_body=1 << 20, verbose=False):
+        self.batcher = batcher if batcher is not None else MicroBatcher()
+        self.max_body = max_body
+        self.verbose = verbose
+        super().__init__(address , _Handler)
+        pass
+
+    def serve_forever(self, poll_interval=0.5):
+        self.batcher.start()
+        try:
+            super().serve_forever(poll_interval)
+        finally:
+            self.batcher.stop()
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m LangSegment.server" , description="LangSegment HTTP segmentation service")
+    parser.add_argument("--host" , default="127.0.0.1" , help="bind address")
+    parser.add_argument("-p" , "--port" , type=int , default=8000 , help="bind port")
+    parser.add_argument("-f" , "--filters" , default=",".join(Segmenter.Langfilters) , help="default comma-separated language filters")
+    parser.add_argument("--max-batch" , type=int , default=64 , help="max requests segmented together")
+    parser.add_argument("--max-wait-ms" , type=float , default=2.0 , help="max milliseconds spent gathering a batch")
+    parser.add_argument("--max-queue" , type=int , default=1024 , help="max queued requests, more get 503")
+    parser.add_argument("--timeout" , type=float , default=5.0 , help="request deadline in seconds, 504 past it")
+    parser.add_argument("--max-body" , type=int , default=1 << 20 , help="max request body in bytes")
+    parser.add_argument("--cache" , type=int , default=0 , help="LRU result cache entries, 0 disables it")
+    parser.add_argument("--disk-cache" , help="persistent classification cache (sqlite file)")
+    parser.add_argument("-v" , "--verbose" , action="store_true" , help="log every request")
+    options = parser.parse_args(argv)
+
+    filters = [item for item in options.filters.split(",") if item]
+    if options.disk_cache:setdiskcache(options.disk_cache)
+    segmenter = Segmenter(filters , cache_size=options.cache)
+    # 启动前加载模型，首个请求不承担加载耗时 , load the model up front so the first request does not pay for it
+    segmenter.warmup()
+    batcher = MicroBatcher(segmenter , options.max_batch , options.max_wait_ms / 1000 , options.max_queue , options.timeout)
+    server = SegmentServer((options.host , options.port) , batcher , options.max_body , options.verbose)
+    print(f"LangSegment serving on http://{options.host}:{server.server_address[1]}" , file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+"""
+流式分词：逐块输入文本，句子边界确定后立即输出已稳定的分词结果，适合实时 TTS。
+Streaming segmentation: feed text chunk by chunk and receive segments as soon as a
+sentence boundary makes them stable, so real-time TTS can start before the full text arrives.
+"""
+
+import re
+
+from .LangSegment import Segmenter, _Context, _as_filters, _segmenter
+from .segment import Segment, todicts
+
+
+# 句子边界：句末标点，连同其后的引号、括号与空白；直引号后紧跟文字时是下一句的开引号，不算在内
+# Sentence boundary: terminal punctuation plus the closing quotes, brackets and spaces after it; a straight
+# quote followed by a word character opens the next sentence and is left out
+_SENTENCE_END = re.compile(r'(?:[。！？!?；;…\n]+|\.(?=\s))(?:[」』”’)）】》]|["\'](?!\w))*\s*')
+# 单引号，不含词内的撇号（don't , it's）, single quotes, apostrophes inside words (don't , it's) excluded
+_SINGLE_QUOTE = re.compile(r"(?<!\w)'|'(?!\w)")
+# 强制切分时可用的片段边界：任意标点或空白，语言标签字符除外
+# Fragment boundaries for forced cuts: any punctuation or whitespace, except the language tag characters
+_FRAGMENT_END = re.compile(r'[^\w<>/|-]')
+_TAG_TOKEN    = re.compile(r'<\/*[a-zA-Z|-]*>')
+_OPENERS      = "【《（(“‘"
+_CLOSERS      = "’”)）》】"
+
+
+def _marks(text):
+    # 语言标签、双引号、单引号的个数与括号的净开启数 , counts of tags, double and single quotes, and the net open brackets
+    return (len(_TAG_TOKEN.findall(text)) , text.count('"') , len(_SINGLE_QUOTE.findall(text)) ,
+            sum(text.count(char) for char in _OPENERS) - sum(text.count(char) for char in _CLOSERS))
+
+def _balanced(marks):
+    # 语言标签、引号与括号未闭合时不能切分
+    # Do not cut inside an open language tag, quote or bracket
+    tags , dquotes , squotes , depth = marks
+    return tags % 2 == 0 and dquotes % 2 == 0 and squotes % 2 == 0 and depth <= 0
+
+def _open_tag(text):
+    # 文本末尾仍未闭合的语言标签名，没有时为 None , name of the language tag still open at the end of text, None if none
+    tags = _TAG_TOKEN.findall(text)
+    return tags[-1].strip("</>") if len(tags) % 2 == 1 else None
+
+def _stable_end(buffer , max_buffer=4096 , scan=None):
+    """
+    功能：返回缓冲区中可安全切分的位置，0 表示需要等待更多文本。
+    scan 为 [已扫描到的句末位置 , 该位置之前的标记计数]，在多次调用之间延续，已扫描的文本不再重复扫描。
+    Function: Return the offset up to which the buffer can be segmented safely, 0 means wait for more text.
+    scan is [last scanned sentence end , mark counts before it], carried between calls so scanned text is
+    never scanned again.
+    """
+    if scan is None:scan = [0 , (0 , 0 , 0 , 0)]
+    position , marks = scan
+    end = 0
+    for matche in _SENTENCE_END.finditer(buffer , position):
+        # 到达缓冲区末尾的边界可能随后续文本延长 , a boundary touching the end of the buffer may still grow
+        if matche.end() >= len(buffer):break
+        marks = tuple(total + count for total , count in zip(marks , _marks(buffer[position:matche.end()])))
+        position = matche.end()
+        if _balanced(marks):end = position
+    scan[:] = [position , marks]
+    if end > 0:return end
+    if len(buffer) <= max_buffer:return 0
+    # 缓冲区过长时强制切分，保证内存有界：依次在句末、最后一个标点或空白处切分，都没有时在 max_buffer 处硬切
+    # Force a cut once the buffer grows too long, keeping memory bounded: at the last sentence end, else at
+    # the last punctuation or whitespace, else a hard cut at max_buffer
+    # 切分处仍打开的语言标签由调用方闭合并在剩余文本前重新打开
+    # A language tag still open at the cut is closed by the caller and reopened before the remaining text
+    if position > 0:return position
+    index = len(buffer) - 1
+    while index > 0 and _FRAGMENT_END.match(buffer , index - 1) is None:index -= 1
+    if index > 0:return index
+    # 硬切不能落在标签内部 , a hard cut must not split a tag
+    start = buffer.rfind("<" , 0 , max_buffer)
+    matche = _TAG_TOKEN.match(buffer , start) if start >= 0 else None
+    if matche is not None and matche.end() > max_buffer:return start if start > 0 else matche.end()
+    return max_buffer
+
+
+class StreamSegmenter():
+    """
+    流式分词器：feed() 输入文本块并返回已稳定的分词结果，flush() 输出剩余结果。
+    Streaming segmenter: feed() takes a chunk and returns the stable segments, flush() returns the rest.
+
+    最后一个分词结果会被保留，直到出现不同语种或调用 flush()，因为后续文本可能与它合并；
+    尚未确定的 zh|ja 片段同样保留在等待列表中。
+    The last segment is held back until another language follows or flush() is called, because
+    the next text may merge into it; undecided zh|ja fragments also stay in the wait list.
+    partial=True 时在每次切分处输出其已有的文本，同一语种可能分成相邻的多段，内存占用不随文本增长。
+    With partial=True its text so far is emitted at every cut instead, so one language may come out as
+    several adjacent segments and memory does not grow with the text.
+
+    合并后的结果通常与 getTexts 的语种划分相同，但切分处的空白可能归入相邻的片段；切分处之后的片段
+    不再参考前一句的上下文，因此可能与 getTexts 不同（如中文句子之后的「東京」は日本，getTexts 将「東京」归为 zh）。
+    Merged output usually has the same language split as getTexts, but whitespace at a cut may end up in the
+    neighbouring segment, and a fragment right after a cut no longer sees the previous sentence's context, so
+    it can differ where getTexts relies on that context (e.g. 「東京」は日本 after a Chinese sentence, where
+    getTexts keeps 「東京」 as zh).
+    """
+
+    def __init__(self, segmenter=None, filters=None, max_buffer=4096, partial=False):
+        """
+        Args:
+            segmenter (Segmenter): 使用的分词器，默认为模块默认实例 , segmenter to use, defaults to the module one
+            filters (list): 过滤器，默认使用分词器的过滤器 , filters, defaults to the segmenter's
+            max_buffer (int): 找不到安全边界时的最大缓冲字符数 , max buffered characters without a safe boundary
+            partial (bool): 在切分处输出最后一个分词结果已有的文本 , emit the last segment's text so far at every cut
+        """
+        self.segmenter = segmenter if segmenter is not None else _segmenter
+        self.filters = _as_filters(filters)
+        self.max_buffer = max_buffer
+        self.partial = partial
+        self.reset()
+        pass
+
+    def reset(self):
+        filters = self.filters if self.filters is not None else self.segmenter.Langfilters
+        self._ctx = _Context(filters)
+        self._buffer = ""
+        self._scan = None
+        self._words = []
+        self._started = False
+        pass
+
+    def _process(self , piece , eos):
+        segmenter = self.segmenter
+        ctx = self._ctx
+        whole = eos and not self._started
+        self._started = not eos
+        words = segmenter._parse(ctx , piece , self._words , eos , whole)
+        if not self.partial or eos or len(words) == 0:
+            self._words = words[-1:]
+            return todicts(word for word in words[:-1] if word.text)
+        # 保留一个空的同语种片段，后续文本仍按原规则与它合并 , keep an empty segment of the same language so later text still merges by the usual rules
+        self._words = [Segment(words[-1].lang)]
+        return todicts(word for word in words if word.text)
+
+    def feed(self , chunk:str):
+        """
+        功能：输入一个文本块，返回已经稳定的分词结果。
+        Function: Feed a chunk of text and return the segments that became stable.\n
+        Returns:
+            list: [{'lang':'zh','text':'?'},...]
+        """
+        if chunk:self._buffer += chunk
+        if self._scan is None:self._scan = [0 , (0 , 0 , 0 , 0)]
+        end = _stable_end(self._buffer , self.max_buffer , self._scan)
+        if end <= 0:return []
+        piece , self._buffer = self._buffer[:end] , self._buffer[end:]
+        # 切分后剩余文本的计数需要重新扫描，切在最后扫描位置时可以直接归零
+        # The counts of the remaining text need a new scan, unless the cut is at the last scanned position
+        self._scan = [0 , (0 , 0 , 0 , 0)] if end == self._scan[0] else None
+        tag = _open_tag(piece)
+        if tag is not None:
+            # 强制切分落在语言标签内：闭合本段，剩余文本仍按该标签的语种处理
+            # A forced cut inside a language tag: close it here so the rest keeps the tag's language
+            piece , self._buffer , self._scan = f"{piece}</{tag}>" , f"<{tag}>{self._buffer}" , None
+        return self._process(piece , False)
+
+    def flush(self):
+        """
+        功能：文本输入结束，返回剩余的全部分词结果，之后可继续输入新的文本。
+        Function: End of input, return every remaining segment; the stream can then be reused.\n
+        Returns:
+            list: [{'lang':'zh','text':'?'},...]
+        """
+        piece , self._buffer , self._scan = self._buffer , "" , None
+        words = self._process(piece , True) + todicts(word for word in self._words if word.text)
+        self._words = []
+        self._ctx.text_waits = []
+        return words
+
+    def getCounts(self):
+        """
+        功能：目前为止的语种统计，同 getCounts。
+        Function: Language statistics so far, same format as getCounts.
+        """
+        lang_count = Segmenter._sort_counts(self._ctx.lang_count)
+        return lang_count if lang_count is not None else [("zh",0)]
+
+
+def getTextsStream(chunks , filters=None , segmenter=None):
+    """
+    功能：流式多语种分词，输入文本块的迭代器，逐个产出已稳定的分词结果\n
+    Feature: Streaming multilingual tokenizing over an iterator of text chunks, yielding segments once they are stable.\n
+    参数-Args:
+        chunks (iterable): 文本块，例如 LLM 逐个输出的 token , text chunks, e.g. tokens streamed from an LLM\n
+        filters (list): 过滤器，默认使用分词器的过滤器 , filters, defaults to the segmenter's\n
+    返回-Returns:
+        generator: {'lang':'zh','text':'?'}\n
+    """
+    stream = StreamSegmenter(segmenter , filters)
+    for chunk in chunks:
+        yield from stream.feed(chunk)
+    yield from stream.flush()
+
+
+def getTextsChunked(document , filters=None , chunk_size=4096 , segmenter=None):
+    """
+    功能：长文档分块分词，在句子/段落边界处切分，块与块之间延续语种上下文，逐个产出结果，内存占用与文档长度无关\n
+    Feature: Chunked segmentation of long documents: cuts at sentence / paragraph boundaries, carries the
+    language context across chunk edges and yields segments lazily, so memory stays flat for any input size.\n
+    参数-Args:
+        document (str|iterable): 整篇文本，或逐块产出文本的迭代器（例如打开的文件）, the whole text or an iterator of pieces (e.g. an open file)\n
+        filters (list): 过滤器，默认使用分词器的过滤器 , filters, defaults to the segmenter's\n
+        chunk_size (int): 每次处理的字符数 , characters handled per step\n
+    返回-Returns:
+        generator: {'lang':'zh','text':'?'}\n
+    """
+    chunk_size = max(1 , chunk_size)
+    chunks = document
+    if isinstance(document , str):
+        chunks = (document[i:i + chunk_size] for i in range(0 , len(document) , chunk_size))
+    # 找不到安全边界时最多缓冲两块；同一语种在块边界处分段输出，不在内存中累积
+    # At most two chunks are buffered when no safe boundary shows up; one language is emitted in parts at
+    # chunk edges instead of accumulating in memory
+    stream = StreamSegmenter(segmenter , filters , max(4096 , chunk_size * 2) , partial=True)
+    for chunk in chunks:
+        yield from stream.feed(chunk)
+    yield from stream.flush()
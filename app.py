@@ -76,7 +76,11 @@ for lang in langdic:
 # print(color_map)
 
 # 处理：
-def parse_language(input_text):
+# 增量分词：每个会话一个 IncrementalSegmenter（保存在 gr.State 中，不在会话间共享），每次点击只重新处理改动的段落，过滤器沿用 setfilters 的设置
+# Incremental segmentation: one IncrementalSegmenter per session (kept in gr.State, never shared between sessions);
+# every click only redoes the changed paragraphs, filters follow setfilters
+def parse_language(input_text , document):
+    if document is None:document = LangSegment.IncrementalSegmenter()
     noneKey = getLanglabel("no")
     output = ""
     codes = []
@@ -84,7 +88,7 @@ def parse_language(input_text):
     # 当前的过滤器
     print(LangSegment.getfilters())
     # （1）处理分词 processing participle
-    langlist = LangSegment.getTexts(input_text)
+    langlist = document.update(input_text)
     for data in langlist:
         output += f'{str(data)}\n'
         lang = data['lang']
@@ -94,12 +98,12 @@ def parse_language(input_text):
     codes.append(("\n\n",noneKey))
     # （2）统计分词 Statistical participle
     label_text = "没有结果显示"
-    langCounts = LangSegment.getCounts()
+    langCounts = document.getCounts()
     if len(langCounts) > 0:
         lang , count = langCounts[0] 
         filters = LangSegment.getfilters()
         label_text = f"您输入的主要语言为：【{getLanglabel(lang)}】。参考依据：{str(langCounts)}。\n过滤保留设置：LangSegment.setfilters({filters})"
-    return output , codes , label_text
+    return output , codes , label_text , document
 
 # 过滤：
 def lang_selected(option:str):
@@ -160,6 +164,8 @@ with gr.Blocks(title="LangSegment WebUI" , css=gr_css) as app:
         若遇到问题，欢迎前往github提供反馈，一起让它变得更易用： https://github.com/juntaosun/LangSegment <br> \
         "
     )
+    # 本会话的增量分词器 , this session's incremental segmenter
+    document = gr.State(None)
     with gr.Group():
         with gr.Row():
             with gr.Column():
@@ -195,8 +201,8 @@ with gr.Blocks(title="LangSegment WebUI" , css=gr_css) as app:
         
         lang_button.click(
             parse_language,
-            [input_text],
-            [output_text , codes_text ,label_text],
+            [input_text , document],
+            [output_text , codes_text ,label_text , document],
         )
         
         lang_filters.change(